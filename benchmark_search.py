@@ -0,0 +1,71 @@
+"""
+Nodes (eval() calls) and time of the tactictoeV2 search modes on the same positions.
+Every position is searched to a fixed depth without a time budget, from an empty transposition table.
+
+    python benchmark_search.py [depth]
+"""
+
+import io
+import sys
+import time
+import random
+import contextlib
+
+import tactictoeV2 as ttt
+
+STATE_COUNT = 30
+
+
+def sample_states(count, seed=11):
+    """
+    Returns count non-terminal states from random games.
+    """
+    rng = random.Random(seed)
+    states = []
+    while len(states) < count:
+        state = ttt.initial_state()
+        for _ in range(rng.randrange(0, 12)):
+            if ttt.terminal(state):
+                break
+            state = ttt.result(state, rng.choice(ttt.actions(state)))
+        if not ttt.terminal(state):
+            states.append(state)
+
+    return states
+
+
+def measure(states, mode):
+    """
+    Returns (nodes, seconds, actions) of searching every state with mode.
+    """
+    nodes = 0
+    seconds = 0.0
+    moves = []
+    for state in states:
+        ttt.transposition_table.clear()
+        ttt.move_orderer.clear()
+        random.seed(0)
+
+        # negamax() prints its progress
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            moves.append(ttt.negamax(state, time_budget=None, node_budget=None, mode=mode))
+            seconds += time.perf_counter() - start
+        nodes += ttt.callcount
+
+    return (nodes, seconds, moves)
+
+
+if __name__ == "__main__":
+
+    ttt.MAX_DEPTH = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    states = sample_states(STATE_COUNT)
+    print(f"{len(states)} states, depth {ttt.MAX_DEPTH}\n")
+
+    baseline = None
+    for mode in ttt.SEARCH_MODES:
+        nodes, seconds, moves = measure(states, mode)
+        baseline = baseline or (nodes, seconds, moves)
+        same = sum(move == base for move, base in zip(moves, baseline[2]))
+        print(f"{mode:>10}: {nodes:>9,} nodes ({nodes / baseline[0]:.2f}x)  {seconds:>7.2f}s ({seconds / baseline[1]:.2f}x)"
+              f"  {same}/{len(states)} same moves")
@@ -0,0 +1,78 @@
+"""
+Query throughput of tactictoe_precalculated with a growing number of threads.
+Every thread plays getBestMove and getStateScore on the same states, reading the one shared table.
+
+    python benchmark_threads.py [max threads]
+"""
+
+import sys
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tactictoe_precalculated as ttt
+
+STATE_COUNT = 2000
+ROUNDS = 5
+
+
+def sample_states(count, seed=0):
+    """
+    Returns count non-terminal states from random games.
+    """
+    rng = random.Random(seed)
+    states = []
+    while len(states) < count:
+        state = ttt.initial_state()
+        for _ in range(rng.randrange(1, 30)):
+            if ttt.terminal(state):
+                break
+            states.append(state)
+            state = ttt.result(state, ttt.getRandomMove(state, rng))
+
+    return states[:count]
+
+
+def run_queries(states, barrier):
+    barrier.wait()
+    for _ in range(ROUNDS):
+        for state in states:
+            ttt.getBestMove(state)
+            ttt.getStateScore(state)
+
+    return 2 * ROUNDS * len(states)
+
+
+def measure(states, thread_count):
+    """
+    Returns the queries per second of thread_count threads.
+    """
+    barrier = threading.Barrier(thread_count + 1)
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        futures = [executor.submit(run_queries, states, barrier) for _ in range(thread_count)]
+        barrier.wait()
+        start = time.perf_counter()
+        queries = sum(future.result() for future in futures)
+        elapsed = time.perf_counter() - start
+
+    return queries / elapsed
+
+
+if __name__ == "__main__":
+
+    max_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    thread_counts = [count for count in (1, 2, 4, 8, 16, 32) if count <= max_threads]
+
+    ttt.init()
+    states = sample_states(STATE_COUNT)
+
+    gil_enabled = sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil_enabled else 'disabled'}")
+    print(f"{len(states)} states x {ROUNDS} rounds x 2 queries per thread\n")
+
+    single = None
+    for thread_count in thread_counts:
+        rate = measure(states, thread_count)
+        single = single or rate
+        print(f"{thread_count:>3} threads: {rate:>12,.0f} queries/s  ({rate / single:.2f}x)")
@@ -1,6 +1,14 @@
 
 import collections
 import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from bisect import bisect_left
 from copy import deepcopy
 from pprint import pprint
 
@@ -21,6 +29,11 @@ TRANSFORMATION_MAPS = (
 
 validStates = [-3, -2, -1, 1, 2, 3]
 
+# Base Scores
+MAX_SCORE = 100
+MIN_SCORE = -100
+DRAW_SCORE = 0
+
 
 def initial_state():
     """
@@ -138,24 +151,276 @@ def decodeState(state_encoded):
     return state
 
 
+# -- Packed state kernel -- #
+# A whole position is packed into one int so the solver never touches lists:
+# - cell k (k = i*3 + j) owns the nibble at bits 4k..4k+3
+# - the 2 LSB of a nibble are the lifetime of the piece (1 to 3), 0 if empty
+# - bit 2 of a nibble is set when the piece belongs to O
+# - bit 36 is set when it is X's turn
+
+CELL_BITS = 4
+TURN_BIT = 1 << 36
+NIBBLE_ONES = sum(0x1 << (CELL_BITS * k) for k in range(9))   # bit 0 of every cell
+PIECE_X = 0x3
+PIECE_O = 0x4 | 0x3
+
+# Each line as a mask of bit 0 of the 3 cells in it
+WIN_MASKS = tuple(
+    sum(0x1 << (CELL_BITS * k) for k in line)
+    for line in (
+        (0, 1, 2), (3, 4, 5), (6, 7, 8),    # rows
+        (0, 3, 6), (1, 4, 7), (2, 5, 8),    # columns
+        (0, 4, 8), (2, 4, 6),               # diagonals
+    )
+)
 
+# Location field (see boardToPosition) that stores each nibble value and its shift in the 24 bit location int
+NIBBLE_TO_FIELD_SHIFT = {
+    0x7: 20,    # -3 -> field 0
+    0x6: 16,    # -2 -> field 1
+    0x5: 12,    # -1 -> field 2
+    0x1: 8,     #  1 -> field 3
+    0x2: 4,     #  2 -> field 4
+    0x3: 0,     #  3 -> field 5
+}
+FIELD_SHIFT_TO_NIBBLE = {shift: nibble for nibble, shift in NIBBLE_TO_FIELD_SHIFT.items()}
+EMPTY_LOCATIONS = 0xFFFFFF
+# Shift of the location field of each cell value in the 24 bit location int
+VALUE_FIELD_SHIFTS = ((-3, 20), (-2, 16), (-1, 12), (1, 8), (2, 4), (3, 0))
+
+# A state key only holds 25 bits of information: 24 bits of locations and the turn bit,
+# (key >> 7) | (key & 0x01) packs them into a dense index (see BFS)
+KEY_BITS = 25
+VISITED_BYTES = 1 << (KEY_BITS - 3)
+
+# Smallest ply worth sending to the worker processes of a parallel BFS
+PARALLEL_MIN_FRONTIER = 1024
+
+# Transform ids: 0 is the identity, t = 1..7 is TRANSFORMATION_MAPS[t-1]
+TRANSFORM_COUNT = len(TRANSFORMATION_MAPS) + 1
+
+# A piece on real cell p ends up on canonical cell TRANSFORM_CELLS[t][p]
+TRANSFORM_CELLS = tuple(
+    tuple(transform_map.index(p) for p in range(9))
+    for transform_map in ((0, 1, 2, 3, 4, 5, 6, 7, 8),) + TRANSFORMATION_MAPS
+)
+# A move on canonical cell c is played on real cell INVERSE_TRANSFORM_CELLS[t][c]
+INVERSE_TRANSFORM_CELLS = tuple(
+    tuple(transform_cells.index(c) for c in range(9))
+    for transform_cells in TRANSFORM_CELLS
+)
 
-def get_canonical_form(board, turn):
 
-    # -- getting the canonical state form -- #
-    min_state_encoded = encodeState(flatten_board(board), turn)
+def _location_byte_map(transform_cells):
+    # Maps one byte of the location encoding (2 location fields) to the transformed byte,
+    # 0x0F (not on the board) is left as is
+    def transform_field(location):
+        return transform_cells[location] if location < 9 else location
+
+    return tuple(
+        (transform_field(byte >> 4) << 4) | transform_field(byte & 0x0F)
+        for byte in range(256)
+    )
+
+
+def _row_location_table(row):
+    # XOR of the location fields set by the 3 nibbles of a board row, indexed by the 12 bits of the row
+    # Built from the fields of each single nibble, XORed together per row
+    nibble_fields = []
+    for offset in range(3):
+        fields = []
+        for nibble in range(1 << CELL_BITS):
+            shift = NIBBLE_TO_FIELD_SHIFT.get(nibble & 0x7)
+            fields.append((0xF ^ (row*3 + offset)) << shift if shift is not None else 0)
+        nibble_fields.append(fields)
+
+    first, second, third = nibble_fields
+    return tuple(first_xor ^ second_xor ^ third_xor
+                 for third_xor in third
+                 for second_xor in second
+                 for first_xor in first)
+
+
+def _board_row_location_table(row):
+    # Same as _row_location_table() for a row of board values, indexed by sum((value + 3) * 7**offset)
+    value_shifts = dict(VALUE_FIELD_SHIFTS)
+    table = []
+    for row_index in range(7 ** 3):
+        location_xor = 0
+        for offset in range(3):
+            value = (row_index // 7 ** offset) % 7 - 3
+            if value:
+                location_xor ^= (0xF ^ (row*3 + offset)) << value_shifts[value]
+        table.append(location_xor)
+
+    return tuple(table)
+
+
+LOCATION_BYTE_MAPS = tuple(_location_byte_map(transform_cells) for transform_cells in TRANSFORM_CELLS)
+ROW_LOCATIONS = tuple(_row_location_table(row) for row in range(3))
+BOARD_ROW_LOCATIONS = tuple(_board_row_location_table(row) for row in range(3))
+ROW_MASK = (1 << (CELL_BITS * 3)) - 1
+
+
+def pack_state(state):
+    """
+    Returns the packed int of a {"turn", "board"} state.
+    """
+    packed = TURN_BIT if state["turn"] == X else 0
+    for k, cell in enumerate(flatten_board(state["board"])):
+        if cell > 0:
+            packed |= cell << (CELL_BITS * k)
+        elif cell < 0:
+            packed |= (0x4 | -cell) << (CELL_BITS * k)
+
+    return packed
+
+
+def unpack_state(packed):
+    """
+    Returns the {"turn", "board"} state of a packed int.
+    """
+    board_flat = []
+    for k in range(9):
+        nibble = (packed >> (CELL_BITS * k)) & 0x7
+        board_flat.append(-(nibble & 0x3) if nibble & 0x4 else nibble)
+
+    return {
+        "board": [board_flat[i:i+3] for i in range(0, 9, 3)],
+        "turn": X if packed & TURN_BIT else O,
+    }
+
+
+def packed_moves(packed):
+    """
+    Returns the empty cells (k = i*3 + j) of a packed state.
+    """
+    return [k for k in range(9) if not (packed >> (CELL_BITS * k)) & 0x3]
+
+
+def packed_result(packed, cell):
+    """
+    Returns the packed state after the player to move places a piece on cell k = i*3 + j.
+    """
+    if (packed >> (CELL_BITS * cell)) & 0x3:
+        raise IndexError("Invalid Move")
+
+    occupied = (packed | (packed >> 1)) & NIBBLE_ONES
+    owner_o = (packed >> 2) & NIBBLE_ONES
+
+    if packed & TURN_BIT:
+        # Age every X piece, a piece that reaches 0 leaves an all zero nibble
+        packed -= occupied & ~owner_o
+        return (packed | (PIECE_X << (CELL_BITS * cell))) ^ TURN_BIT
+
+    # Age every O piece and clear the owner bit of the ones that expired
+    packed -= owner_o
+    occupied = (packed | (packed >> 1)) & NIBBLE_ONES
+    packed ^= (owner_o & ~occupied) << 2
+    return (packed | (PIECE_O << (CELL_BITS * cell))) ^ TURN_BIT
+
+
+def packed_winner(packed):
+    """
+    Returns X or O if they have 3 in a line on the packed state, 0 otherwise.
+    """
+    owner_o = (packed >> 2) & NIBBLE_ONES
+    owner_x = (packed | (packed >> 1)) & NIBBLE_ONES & ~owner_o
+
+    for mask in WIN_MASKS:
+        if owner_x & mask == mask:
+            return X
+        if owner_o & mask == mask:
+            return O
+
+    return 0
+
+
+def packed_locations(packed):
+    """
+    Returns the 24 bit location int (the first 3 bytes of encodeState()) of the packed state.
+    """
+    return (EMPTY_LOCATIONS
+            ^ ROW_LOCATIONS[0][packed & ROW_MASK]
+            ^ ROW_LOCATIONS[1][(packed >> 12) & ROW_MASK]
+            ^ ROW_LOCATIONS[2][(packed >> 24) & ROW_MASK])
+
+
+def canonicalize(packed):
+    """
+    Returns (canonical_key, transform_id) of the packed state.
+    The canonical key is the same value as get_canonical_form(), and the transform maps the
+    real board onto the canonical board (see TRANSFORM_CELLS / INVERSE_TRANSFORM_CELLS).
+    """
+    location_int = packed_locations(packed)
+    byte0 = location_int >> 16
+    byte1 = (location_int >> 8) & 0xFF
+    byte2 = location_int & 0xFF
+
+    min_location = location_int
+    min_transform = 0
+    for transform_id in range(1, TRANSFORM_COUNT):
+        byte_map = LOCATION_BYTE_MAPS[transform_id]
+        transformed = (byte_map[byte0] << 16) | (byte_map[byte1] << 8) | byte_map[byte2]
+        if transformed < min_location:
+            min_location = transformed
+            min_transform = transform_id
+
+    return ((min_location << 8) | (1 if packed & TURN_BIT else 0), min_transform)
+
+
+def packed_canonical(packed):
+    """
+    Returns the canonical state key of the packed state, same value as get_canonical_form().
+    """
+    return canonicalize(packed)[0]
+
+
+def swap_colors(packed):
+    """
+    Returns the packed state with every X piece turned into an O piece (and O into X) and the turn flipped.
+    The score of the swapped state is the negated score of the original state.
+    """
+    occupied = (packed | (packed >> 1)) & NIBBLE_ONES
+    return packed ^ (occupied << 2) ^ TURN_BIT
+
 
-    for transform_map in TRANSFORMATION_MAPS:
+def canonicalize_colors(packed):
+    """
+    Returns (canonical_key, transform_id, sign) of the packed state, also reduced by swapping X and O.
+    When it is O's turn the colors are swapped first (sign = -1), so every canonical key has X to move,
+    and a score stored for the canonical key is the score of the real state multiplied by sign.
+    """
+    if packed & TURN_BIT:
+        return canonicalize(packed) + (1,)
+
+    return canonicalize(swap_colors(packed)) + (-1,)
 
-        flat_board = flatten_board(board)
-        transformed_board = [flat_board[i] for i in transform_map]
 
-        transformed_state_encoded = encodeState(transformed_board, turn)
+def key_to_packed(key):
+    """
+    Returns the packed state of a state key (encodeState() read as a big-endian int).
+    """
+    packed = TURN_BIT if key & 0x01 else 0
+    location_int = key >> 8
+    for shift, nibble in FIELD_SHIFT_TO_NIBBLE.items():
+        k = (location_int >> shift) & 0x0F
+        if k != 0x0F:
+            packed |= nibble << (CELL_BITS * k)
 
-        if transformed_state_encoded < min_state_encoded:
-            min_state_encoded = transformed_state_encoded
+    return packed
 
-    return min_state_encoded
+
+def key_to_bytes(key):
+    return key.to_bytes(4, "big")
+
+
+def get_canonical_form(board, turn):
+
+    # -- getting the canonical state form -- #
+    canonical_key, _ = canonicalize(pack_state({"board": board, "turn": turn}))
+
+    return key_to_bytes(canonical_key)
 
 
 def result(state, action):
@@ -237,37 +502,261 @@ def terminal(state):
     return False
 
 
-def BFS(initial_state):
+def load_numpy(feature):
+    """
+    Returns the numpy module, raises ImportError naming feature if it is not installed.
+    numpy is only needed by the numpy BFS / solver and the batch queries, importing it on first use
+    keeps it out of the processes that only serve moves.
+    """
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError(f"numpy is required for {feature}") from e
+    return numpy
+
 
-    states_list = set()
-    queue = collections.deque()
+def BFS(initial_state, emit_graph=False, mode="python", workers=1, color_swap=False):
+    """
+    Returns the set of every reachable canonical state (encoded bytes).
+    mode="numpy" expands each ply as arrays (see _bfs_numpy()) and finds the same states and edges.
+    workers > 1 expands the plies of the python mode in a pool of processes, with the same output.
+    color_swap stores the states reduced by canonicalize_colors(): every state has X to move, and the
+    child_winner of an edge is the winner on the color swapped child (always O).
+    With emit_graph, returns (states, edges) where edges lists every move of every non-terminal
+    state as (parent_key, cell, child_key, child_winner, ply): the cell is on the canonical
+    parent board, child_winner is the terminal flag (X / O, 0 when the game goes on) and ply
+    is the depth of the parent + 1.
+    """
+    if color_swap:
+        start_key = canonicalize_colors(pack_state(initial_state))[0]
+    else:
+        start_key = packed_canonical(pack_state(initial_state))
+
+    if mode == "numpy":
+        if workers > 1:
+            raise ValueError("workers is only supported by the python BFS mode")
+        load_numpy("BFS(mode=\"numpy\")")
+        keys, edges, ply_counts = _bfs_numpy(start_key, emit_graph, color_swap)
+        states_list = keys.tolist()
+    elif mode == "python" and workers > 1:
+        # Imported here, multiprocessing is slow to import and only the pooled BFS needs it
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            states_list, edges, ply_counts = _bfs_python(start_key, emit_graph, executor, workers, color_swap)
+    elif mode == "python":
+        states_list, edges, ply_counts = _bfs_python(start_key, emit_graph, color_swap=color_swap)
+    else:
+        raise ValueError(f"Unknown BFS mode: {mode}")
+
+    print(f"Total states: {len(states_list)}, Depth: {len(ply_counts)}")
+    print(f"States per ply: {ply_counts}")
+    states_encoded = set(key_to_bytes(key) for key in states_list)
+
+    if emit_graph:
+        print(f"Total edges: {len(edges)}")
+        return (states_encoded, edges)
+    return states_encoded
+
+
+def _expand_keys(keys, color_swap=False):
+    """
+    Returns (parent_key, cell, child_key, child_winner) for every move of the states, in order.
+    Module level so it can run in the worker processes of a parallel BFS.
+    """
+    expanded = []
+    for key in keys:
+        packed = key_to_packed(key)
+        for cell in packed_moves(packed):
+            new_packed = packed_result(packed, cell)
+            if color_swap:
+                # The child has O to move, store it with the colors swapped
+                new_packed = swap_colors(new_packed)
+            expanded.append((key, cell, packed_canonical(new_packed), packed_winner(new_packed)))
+
+    return expanded
+
+
+def _bfs_python(start_key, emit_graph=False, executor=None, workers=1, color_swap=False):
+    """
+    Level synchronous BFS over packed states, returns (keys, edges, ply_counts).
+    With an executor, each ply is split into chunks expanded by the worker processes, the results are
+    merged in frontier order so the output does not depend on the number of workers.
+    """
+    # One bit per possible key, and every visited key in the order it was found
+    visited = bytearray(VISITED_BYTES)
+    start_index = (start_key >> 7) | (start_key & 0x01)
+    visited[start_index >> 3] |= 1 << (start_index & 7)
+    states_list = array("I", [start_key])
+    edges = []
+
+    # The frontier holds the keys of the non-terminal states of the current ply,
+    # states are expanded from their canonical board so the edge cells are canonical moves
+    frontier = array("I")
+    if packed_winner(key_to_packed(start_key)) == 0:
+        frontier.append(start_key)
     depth = 0
+    ply_counts = [1]
 
-    states_list.add(get_canonical_form(initial_state["board"], initial_state["turn"]))
-    queue.append((initial_state, depth))
+    while frontier:
+        next_frontier = array("I")
+        ply_count = 0
 
-    while queue:
-        # get a vertex from queue
-        state, depth = queue.popleft()
-        # if depth == 2:
-        #     print(f"Turn: {state["turn"]}, Depth: {depth}")
+        if executor is not None and len(frontier) >= PARALLEL_MIN_FRONTIER:
+            chunk_size = -(-len(frontier) // workers)
+            chunks = [frontier[i:i+chunk_size] for i in range(0, len(frontier), chunk_size)]
+            expanded = [move for chunk in executor.map(_expand_keys, chunks, [color_swap] * len(chunks)) for move in chunk]
+        else:
+            expanded = _expand_keys(frontier, color_swap)
 
-        if winner(state) != 0:
-            continue
+        # if not visited, mark it and add it to the next ply (terminal states are never expanded)
+        for key, cell, new_key, new_winner in expanded:
+            if emit_graph:
+                edges.append((key, cell, new_key, new_winner, depth+1))
 
-        # if not in list, add to list and queue
-        moves = get_moves(state)
-        for move in moves:
-            newstate = result(state, move)
-            if get_canonical_form(newstate["board"], newstate["turn"]) in states_list:
+            new_index = (new_key >> 7) | (new_key & 0x01)
+            new_bit = 1 << (new_index & 7)
+            if visited[new_index >> 3] & new_bit:
                 continue
-            else:
-                states_list.add(get_canonical_form(newstate["board"], newstate["turn"]))
-                queue.append((newstate, depth+1))
-                # print(len(states_list), depth+1)
 
-    print(f"Total states: {len(states_list)}, Depth: {depth+1}")
-    return states_list
+            visited[new_index >> 3] |= new_bit
+            states_list.append(new_key)
+            ply_count += 1
+            if new_winner == 0:
+                next_frontier.append(new_key)
+
+        if ply_count:
+            ply_counts.append(ply_count)
+        frontier = next_frontier
+        depth += 1
+
+    return (states_list, edges, ply_counts)
+
+
+# -- Vectorized helpers, boards as (N, 9) int8 arrays of cell values -- #
+
+WIN_LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))
+
+
+def keys_to_boards(keys):
+    """
+    Returns the (N, 9) boards and the X to move flags of an array of state keys.
+    """
+    np = load_numpy("keys_to_boards()")
+    locations = keys >> 8
+    boards = np.zeros((len(keys), 9), dtype=np.int8)
+    for value, shift in VALUE_FIELD_SHIFTS:
+        cells = (locations >> shift) & 0x0F
+        on_board = np.flatnonzero(cells != 0x0F)
+        boards[on_board, cells[on_board]] = value
+
+    return (boards, (keys & 0x01).astype(bool))
+
+
+def boards_winner(boards):
+    """
+    Returns the winner (X, O or 0) of each of the (N, 9) boards.
+    """
+    np = load_numpy("boards_winner()")
+    lines = boards[:, WIN_LINES]
+    x_wins = (lines > 0).all(axis=2).any(axis=1)
+    o_wins = (lines < 0).all(axis=2).any(axis=1)
+
+    return np.where(x_wins, X, np.where(o_wins, O, 0)).astype(np.int8)
+
+
+def boards_canonicalize(boards, x_to_move):
+    """
+    Returns (canonical_keys, transform_ids) of the (N, 9) boards, same values as canonicalize().
+    The location int of each board is the XOR of 3 row lookups, then every transform moves it
+    with one gather per location byte.
+    """
+    np = load_numpy("boards_canonicalize()")
+    row_lookup = np.array(BOARD_ROW_LOCATIONS, dtype=np.int64)
+    byte_lookup = np.array(LOCATION_BYTE_MAPS, dtype=np.int64)
+
+    digits = boards.astype(np.int64) + 3
+    rows = digits[:, 0::3] + 7*digits[:, 1::3] + 49*digits[:, 2::3]
+    location_int = EMPTY_LOCATIONS ^ row_lookup[0, rows[:, 0]] ^ row_lookup[1, rows[:, 1]] ^ row_lookup[2, rows[:, 2]]
+
+    locations = ((byte_lookup[:, location_int >> 16] << 16)
+                 | (byte_lookup[:, (location_int >> 8) & 0xFF] << 8)
+                 | byte_lookup[:, location_int & 0xFF])
+
+    # The first minimum matches the transform picked by canonicalize()
+    transform_ids = locations.argmin(axis=0)
+    min_locations = locations[transform_ids, np.arange(len(boards))]
+
+    return ((min_locations << 8) | x_to_move, transform_ids)
+
+
+def boards_children(boards, x_to_move):
+    """
+    Returns (parents, cells, children, children_x_to_move) for every legal move of the (N, 9) boards,
+    ordered by parent then cell. parents are the row of the parent board.
+    """
+    np = load_numpy("boards_children()")
+    # Age the pieces of the player to move
+    sign = np.where(x_to_move, 1, -1).astype(np.int8)[:, None]
+    decayed = boards - sign * ((boards * sign) > 0)
+
+    # One copy of the decayed board per cell with the new piece on that cell
+    children = np.repeat(decayed[:, None, :], 9, axis=1)
+    cell_range = np.arange(9)
+    children[:, cell_range, cell_range] = sign * X
+
+    parents, cells = np.nonzero(boards == EMPTY)
+    return (parents, cells, children[parents, cells], ~x_to_move[parents])
+
+
+def _bfs_numpy(start_key, emit_graph=False, color_swap=False):
+    """
+    Level synchronous BFS, each ply is expanded as arrays: decay and placement for every
+    frontier state x 9 cells at once, vectorized canonicalization and np.unique deduplication.
+    Returns (keys, edges, ply_counts) where keys are the visited keys by ply.
+    """
+    np = load_numpy("_bfs_numpy()")
+    visited = np.array([start_key], dtype=np.int64)
+    keys_by_ply = [visited]
+    ply_counts = [1]
+    edges = []
+
+    frontier = visited
+    if boards_winner(keys_to_boards(frontier)[0])[0] != 0:
+        frontier = frontier[:0]
+    depth = 0
+
+    while len(frontier):
+        boards, x_to_move = keys_to_boards(frontier)
+        parents, cells, children, children_x_to_move = boards_children(boards, x_to_move)
+        if color_swap:
+            # Every child has O to move, store them with the colors swapped
+            children = -children
+            children_x_to_move = ~children_x_to_move
+        child_keys, _ = boards_canonicalize(children, children_x_to_move)
+        child_winners = boards_winner(children)
+
+        # Deduplicate the ply and drop the states found in earlier plies
+        new_keys, first = np.unique(child_keys, return_index=True)
+        is_new = ~np.isin(new_keys, visited, assume_unique=True)
+        new_keys = new_keys[is_new]
+        new_winners = child_winners[first[is_new]]
+
+        visited = np.union1d(visited, new_keys)
+        keys_by_ply.append(new_keys)
+        ply_counts.append(len(new_keys))
+
+        if emit_graph:
+            edges.extend(zip(frontier[parents].tolist(), cells.tolist(), child_keys.tolist(),
+                             child_winners.tolist(), [depth+1] * len(child_keys)))
+
+        # terminal states are never expanded
+        frontier = new_keys[new_winners == 0]
+        depth += 1
+
+    if ply_counts[-1] == 0:
+        ply_counts.pop()
+
+    return (np.concatenate(keys_by_ply), edges, ply_counts)
 
 
 def findDuplicates(states_encoded):
@@ -301,132 +790,277 @@ def findDuplicates(states_encoded):
     return (duplicates, duplicates_pair)
 
 
-def evaluate_best_moves(states_encoded):
-    # Base Scores
-    MAX_SCORE = 100
-    MIN_SCORE = -100
-    DRAW_SCORE = 0
+def retrograde_solve(children, scores, color_swap=False):
+    """
+    Solves the scores of every state by working backward from the terminal states.
+    children maps each state key to its [(cell, child_key), ...], empty for terminal states,
+    and scores must hold the terminal scores (+-MAX) and 0 for every other state.
+    A state is resolved as soon as one child wins for the player to move, or once every child
+    is resolved as a loss. The queue is processed in order of distance to the end of the game
+    so each score is the fastest win / slowest loss shifted by 1 per move, and states that are
+    never resolved are draws (scores left at 0).
+    With color_swap the states are reduced by canonicalize_colors(), so a child score is negated
+    to be seen from its parent.
+    """
+    # Predecessor index, one entry per edge so each edge is counted once
+    parents = collections.defaultdict(list)
+    unresolved = {}
+    queue = collections.deque()
 
+    for key, children_data in children.items():
+        if len(children_data) == 0:
+            queue.append(key)
+            continue
+        unresolved[key] = len(children_data)
+        for _, child in children_data:
+            parents[child].append(key)
+
+    # Slowest losing child score of each state seen so far
+    best_loss = {}
+
+    while queue:
+        child = queue.popleft()
+        child_score = -scores[child] if color_swap else scores[child]
+
+        for parent in parents[child]:
+            if parent not in unresolved:
+                continue
+
+            # Score of the child from the point of view of the player to move on the parent
+            x_to_move = parent & 0x01
+            if (child_score > 0) == bool(x_to_move):
+                # A winning move resolves the parent straight away
+                scores[parent] = child_score - 1 if child_score > 0 else child_score + 1
+                del unresolved[parent]
+                queue.append(parent)
+                continue
+
+            if parent not in best_loss or abs(child_score) < abs(best_loss[parent]):
+                best_loss[parent] = child_score
+
+            unresolved[parent] -= 1
+            if unresolved[parent] == 0:
+                # Every move loses, take the slowest loss
+                loss_score = best_loss[parent]
+                scores[parent] = loss_score - 1 if loss_score > 0 else loss_score + 1
+                del unresolved[parent]
+                queue.append(parent)
+
+    print(f"Retrograde analysis resolved {len(children) - len(unresolved)} states, {len(unresolved)} draws")
+
+
+def expand_states(states_encoded, edges=None, color_swap=False):
+    """
+    Returns (children, scores) keyed by the int state keys:
+    children = {state_key: [(cell1, child_key1), (cell2, child_key2), ...]}, empty for terminal states
+    scores = {state_key: MAX_SCORE / MIN_SCORE for terminal states, DRAW_SCORE otherwise}
+    When the edges emitted by BFS() are given they are used as is instead of expanding every state again.
+    color_swap keys the children by canonicalize_colors() (the states must come from BFS(color_swap=True)).
+    """
     scores = {}
-    
-    # Create a lookup for the children of each state to avoid re-calculating
-    # children = {encoded_state: set((move1, child1), (move2, child2), ...)}
     children = {}
-    for state_encoded in states_encoded:
 
-        state = decodeState(state_encoded)
+    if edges is not None:
+        for state_encoded in states_encoded:
+            key = int.from_bytes(state_encoded, "big")
+            scores[key] = DRAW_SCORE
+            children[key] = []
 
-        # Only calculate children for non-terminal states
-        if winner(state) == 0:
-            children[state_encoded] = set([(move, get_canonical_form(result(state, move)["board"], result(state, move)["turn"])) for move in get_moves(state)])
-        else:
-            children[state_encoded] = set()
+        for parent, cell, child, child_winner, _ in edges:
+            children[parent].append((cell, child))
+            if child_winner == X:
+                scores[child] = MAX_SCORE
+            elif child_winner == O:
+                scores[child] = MIN_SCORE
+
+        return (children, scores)
+
+    for state_encoded in states_encoded:
+
+        key = int.from_bytes(state_encoded, "big")
+        packed = key_to_packed(key)
 
-        # 1. Init scores
-        state_winner = winner(state)
+        # Init scores, only calculate children for non-terminal states
+        state_winner = packed_winner(packed)
         if state_winner == X:
-            scores[state_encoded] = MAX_SCORE
-            # print("winn")
+            scores[key] = MAX_SCORE
+            children[key] = []
         elif state_winner == O:
-            scores[state_encoded] = MIN_SCORE
-            # print("loss")
+            scores[key] = MIN_SCORE
+            children[key] = []
         else:
-            scores[state_encoded] = DRAW_SCORE
+            scores[key] = DRAW_SCORE
+            if color_swap:
+                children[key] = [(cell, canonicalize_colors(packed_result(packed, cell))[0]) for cell in packed_moves(packed)]
+            else:
+                children[key] = [(cell, packed_canonical(packed_result(packed, cell))) for cell in packed_moves(packed)]
 
+    return (children, scores)
 
-    # 2. Iteration until convergence
-    iteration_count = 0
-    while True:
-        iteration_count += 1
-        print(f"Starting iteration {iteration_count}...")
-        
-        # Keep track of changes in a single pass
-        changes = 0
-        
-        # Go through every state that is not a terminal win/loss
-        for state_encoded, children_data in children.items():
-            if len(children_data) == 0:
-                continue
 
-            state_children_encoded = [data[1] for data in children_data]
-
-            # Get the current scores of all children states
-            # Note: We use the scores from the *previous* iteration to calculate the new ones
-            child_scores = [scores[state_child_encoded] for state_child_encoded in state_children_encoded]
-            # pprint(child_scores)
-
-            # Apply the minimax principle
-            best_child_score = 0
-            if decodeState(state_encoded)["turn"] == X:
-                best_child_score = max(child_scores)
-            else:  # Turn is O
-                best_child_score = min(child_scores)
-            
-
-            # Adjust the score based on depth
-            new_score = 0
-            if best_child_score > DRAW_SCORE:  # It's a path to a win
-                new_score = best_child_score - 1
-            elif best_child_score < DRAW_SCORE: # It's a path to a loss
-                new_score = best_child_score + 1
-            else: # It's a draw
-                new_score = DRAW_SCORE
-
-            if scores[state_encoded] != new_score:
-                scores[state_encoded] = new_score
-                changes += 1
-
-        print(f"Iteration {iteration_count} finished with {changes} updates.")
-        
-        # 3. Convergence Check
-        if changes == 0:
-            # pprint(children)
-            print("Scores have converged. Halting.")
-            break
+def evaluate_best_moves(states_encoded, edges=None, color_swap=False):
+    # With color_swap (states from BFS(color_swap=True)) every state has X to move, and the move
+    # scores are the child scores negated so that they are seen from the parent
+
+    # 1. Create a lookup for the children of each state to avoid re-calculating
+    children, scores = expand_states(states_encoded, edges, color_swap)
+    child_sign = -1 if color_swap else 1
+
+    # 2. Solve backward from the terminal states
+    retrograde_solve(children, scores, color_swap)
 
 
     # Normalize the scores
-    score_positive = min([score for score in scores.values() if score != 0 and score > 0])
-    score_negative = max([score for score in scores.values() if score != 0 and score < 0])
-    for state_encoded, score in scores.items():
+    # With color_swap the scores are mover-relative, one offset for both signs keeps them the real
+    # scores negated (separate offsets would be taken from the X to move states only)
+    if color_swap:
+        score_positive = min([abs(score) for score in scores.values() if score != 0])
+        score_negative = -score_positive
+    else:
+        score_positive = min([score for score in scores.values() if score != 0 and score > 0])
+        score_negative = max([score for score in scores.values() if score != 0 and score < 0])
+    for key, score in scores.items():
         if score > 0:
             score = score - score_positive + 1
         elif score < 0:
             score = score - score_negative - 1
-        scores[state_encoded] = score
+        scores[key] = score
     print(f"Max Score: {max(scores.values())}")
     print(f"Min Score: {min(scores.values())}")
 
-    # Store the new best moves
+    # Store the new best moves and the score of every move, keyed by the encoded bytes
     best_moves = {}
-    for state_encoded, children_data in children.items():
+    move_scores = {}
+    for key, children_data in children.items():
         if len(children_data) == 0:
             continue
-        # if scores[state_encoded] != 0:
-        #     if decodeState(state_encoded)["turn"] == X:
-        #         best_move_score = scores[state_encoded] + 1
-        #     else:
-        #         best_move_score = scores[state_encoded] - 1
-        # else:
-        #     # if in drawing state, get the move that results in the max or min (this must just be 0, which is the reason its draw)
-        if decodeState(state_encoded)["turn"] == X:
-            best_move_score = max([scores[child[1]] for child in children_data])
+
+        child_scores = [child_sign * scores[child] for _, child in children_data]
+        if key & 0x01:
+            best_move_score = max(child_scores)
         else:
-            best_move_score = min([scores[child[1]] for child in children_data]) 
+            best_move_score = min(child_scores)
+
+        # Moves are kept in cell order so the exported tables are deterministic
+        state_encoded = key_to_bytes(key)
+        best_moves[state_encoded] = [divmod(cell, 3) for (cell, _), score in zip(children_data, child_scores) if score == best_move_score]
+        move_scores[state_encoded] = [(divmod(cell, 3), score, key_to_bytes(child)) for (cell, child), score in zip(children_data, child_scores)]
+
+    scores = {key_to_bytes(key): score for key, score in scores.items()}
+
+    print("")
+    print(f"Found scores for {len(states_encoded)} states")
+    print(f"Found best moves for {len(best_moves)} states")
+    print("")
+
+    return (scores, move_scores, best_moves)
+
+
+def build_csr(children, scores):
+    """
+    Returns the state graph as CSR numpy arrays, states are indexed by the rank of their key:
+    (keys, terminal_scores, offsets, child_index, child_cells)
+    The children of state i are child_index[offsets[i]:offsets[i+1]], reached by playing child_cells.
+    """
+    np = load_numpy("build_csr()")
+    keys = np.array(sorted(children), dtype=np.int64)
+    terminal_scores = np.array([scores[key] for key in keys.tolist()], dtype=np.int32)
 
-        best_moves[state_encoded] = [move for move, child in children_data if scores[child] == best_move_score]
+    counts = np.array([len(children[key]) for key in keys.tolist()], dtype=np.int64)
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
 
-        # sanity check that there must be atleast one best move for each state
-        if len(best_moves[state_encoded]) == 0:
-            pprint((best_moves[state_encoded], best_move_score, decodeState(state_encoded)["turn"]))
-            pprint((decodeState(state_encoded)["board"], scores[state_encoded], [scores[child[1]] for child in children_data]))
-            raise ValueError
+    edges = [edge for key in keys.tolist() for edge in children[key]]
+    child_cells = np.array([cell for cell, _ in edges], dtype=np.int8)
+    child_index = np.searchsorted(keys, np.array([child for _, child in edges], dtype=np.int64))
 
+    return (keys, terminal_scores, offsets, child_index, child_cells)
+
+
+def numpy_solve(keys, terminal_scores, offsets, child_index, color_swap=False):
+    """
+    Returns the score array of the CSR state graph (see build_csr()).
+    Every iteration updates all the non-terminal states at once with a segmented max / min
+    over the child scores, until nothing changes. With color_swap the child scores are negated.
+    """
+    np = load_numpy("numpy_solve()")
+    child_sign = -1 if color_swap else 1
+    scores = terminal_scores.copy()
+
+    # Only non-terminal states have children, so their segments are contiguous in child_index
+    inner = np.flatnonzero(offsets[1:] > offsets[:-1])
+    starts = offsets[inner]
+    x_to_move = (keys[inner] & 0x01).astype(bool)
+
+    iteration_count = 0
+    while True:
+        iteration_count += 1
+        child_scores = child_sign * scores[child_index]
+        best_child_score = np.where(x_to_move,
+                                    np.maximum.reduceat(child_scores, starts),
+                                    np.minimum.reduceat(child_scores, starts))
+
+        # Adjust the score based on depth, a draw stays at 0
+        new_scores = best_child_score - np.sign(best_child_score)
+        if np.array_equal(new_scores, scores[inner]):
+            break
+        scores[inner] = new_scores
+
+    print(f"Numpy solver converged after {iteration_count} iterations")
+    return scores
+
+
+def evaluate_best_moves_numpy(states_encoded, edges=None, color_swap=False):
+    """
+    Same result as evaluate_best_moves(), solved with vectorized numpy passes over a CSR graph.
+    """
+    np = load_numpy("evaluate_best_moves_numpy()")
+
+    children, scores = expand_states(states_encoded, edges, color_swap)
+    keys, terminal_scores, offsets, child_index, child_cells = build_csr(children, scores)
+    score_arr = numpy_solve(keys, terminal_scores, offsets, child_index, color_swap)
+    child_sign = -1 if color_swap else 1
+
+    # Normalize the scores
+    # One offset for both signs with color_swap, see evaluate_best_moves()
+    positive = score_arr > 0
+    negative = score_arr < 0
+    if color_swap:
+        offset = np.abs(score_arr[positive | negative]).min()
+        score_arr[positive] -= offset - 1
+        score_arr[negative] += offset - 1
+    else:
+        score_arr[positive] -= score_arr[positive].min() - 1
+        score_arr[negative] -= score_arr[negative].max() + 1
+    print(f"Max Score: {score_arr.max()}")
+    print(f"Min Score: {score_arr.min()}")
+
+    # Best move score of each state, broadcast over its edges
+    counts = np.diff(offsets)
+    inner = np.flatnonzero(counts)
+    child_scores = child_sign * score_arr[child_index]
+    best_child_score = np.zeros(len(keys), dtype=score_arr.dtype)
+    best_child_score[inner] = np.where((keys[inner] & 0x01).astype(bool),
+                                       np.maximum.reduceat(child_scores, offsets[inner]),
+                                       np.minimum.reduceat(child_scores, offsets[inner]))
+    is_best = child_scores == np.repeat(best_child_score, counts)
+
+    # Back to the dicts returned by evaluate_best_moves()
+    key_bytes = [key_to_bytes(key) for key in keys.tolist()]
+    moves = [divmod(cell, 3) for cell in child_cells.tolist()]
+    edge_scores = child_scores.tolist()
+    edge_best = is_best.tolist()
+    edge_child = child_index.tolist()
+    edge_offsets = offsets.tolist()
+
+    best_moves = {}
     move_scores = {}
-    for state_encoded, children_data in children.items():
-        if len(children_data) == 0:
-            continue
-        move_scores[state_encoded] = [(move, scores[child], child) for move, child in children_data]
+    for i in inner.tolist():
+        edge_range = range(edge_offsets[i], edge_offsets[i+1])
+        best_moves[key_bytes[i]] = [moves[e] for e in edge_range if edge_best[e]]
+        move_scores[key_bytes[i]] = [(moves[e], edge_scores[e], key_bytes[edge_child[e]]) for e in edge_range]
+
+    scores = dict(zip(key_bytes, score_arr.tolist()))
 
     print("")
     print(f"Found scores for {len(states_encoded)} states")
@@ -436,7 +1070,6 @@ def evaluate_best_moves(states_encoded):
     return (scores, move_scores, best_moves)
 
 
-
 def storeMoves(states_encoded, states_duplicate_pair, best_moves, scores):
     
     encoded_moves = list()
@@ -556,15 +1189,243 @@ def optimizeSize(states_encoded, scores, best_moves):
     return encoded_best_moves
 
 
-def calculate():
+def calculate(solver="retrograde", bfs_mode="python", workers=1, color_swap=False):
 
     starting_state = initial_state()
-    states_encoded = BFS(starting_state)
-    scores, move_scores, best_moves = evaluate_best_moves(states_encoded)
+    states_encoded, edges = BFS(starting_state, emit_graph=True, mode=bfs_mode, workers=workers, color_swap=color_swap)
+    if solver == "retrograde":
+        scores, move_scores, best_moves = evaluate_best_moves(states_encoded, edges, color_swap)
+    elif solver == "numpy":
+        scores, move_scores, best_moves = evaluate_best_moves_numpy(states_encoded, edges, color_swap)
+    else:
+        raise ValueError(f"Unknown solver: {solver}")
 
     return (states_encoded, scores, move_scores, best_moves)
 
 
+# Markers used by the array backed tables (same values as the microcontroller table)
+NO_MOVE = 0x0F
+NO_SCORE = 0x7F
+
+
+class SolvedTable:
+    """
+    Solved states stored in flat arrays indexed by rank.
+    The rank of a state is the index of its canonical key in the sorted key array (0..N-1).
+    - keys:       array('I') of the sorted canonical state keys
+    - best_cells: array('H') of the canonical cells with the best score as a 9 bit mask, 0 for terminal states
+    - scores:     array('b') of the score of each state
+    The per-move scores are not stored, move_score_row() looks up the children instead.
+    The arrays can also be memoryviews of a mapped solution file, see map_solution().
+    A table is immutable, the arrays are only kept as read-only memoryviews, so it can be
+    read from any number of threads without locks.
+    """
+
+    __slots__ = ("keys", "best_cells", "scores")
+
+    def __init__(self, keys, best_cells, scores):
+        object.__setattr__(self, "keys", memoryview(keys).toreadonly())
+        object.__setattr__(self, "best_cells", memoryview(best_cells).toreadonly())
+        object.__setattr__(self, "scores", memoryview(scores).toreadonly())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SolvedTable is read-only")
+
+    @classmethod
+    def from_solution(cls, scores, best_moves):
+        """
+        Returns the table of the dicts returned by evaluate_best_moves().
+        """
+        keys = array("I", sorted(int.from_bytes(state_encoded, "big") for state_encoded in scores))
+        best_arr = array("H", bytes(2 * len(keys)))
+        score_arr = array("b", bytes(len(keys)))
+
+        for rank, key in enumerate(keys):
+            state_encoded = key_to_bytes(key)
+            score_arr[rank] = scores[state_encoded]
+            for move in best_moves.get(state_encoded, ()):
+                best_arr[rank] |= 1 << flatten_move(move)
+
+        return cls(keys, best_arr, score_arr)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return self.rank(key) >= 0
+
+    def rank(self, key):
+        """
+        Returns the rank of a canonical state key, -1 if the state is not in the table.
+        """
+        rank = bisect_left(self.keys, key)
+        if rank < len(self.keys) and self.keys[rank] == key:
+            return rank
+        return -1
+
+    def unrank(self, rank):
+        """
+        Returns the canonical state key of a rank.
+        """
+        return self.keys[rank]
+
+    def score(self, rank):
+        return self.scores[rank]
+
+    def best_move(self, rank):
+        """
+        Returns the first best canonical cell of a rank, NO_MOVE for terminal states.
+        """
+        cells = self.best_cells[rank]
+        return (cells & -cells).bit_length() - 1 if cells else NO_MOVE
+
+    def best_move_cells(self, rank):
+        """
+        Returns every canonical cell with the best move score of a rank, empty for terminal states.
+        """
+        cells = self.best_cells[rank]
+        return [cell for cell in range(9) if cells >> cell & 0x01]
+
+    def move_score_row(self, rank):
+        """
+        Returns the 9 move scores of a rank, indexed by canonical cell.
+        Each empty cell costs one canonicalization and lookup of the child, other cells are NO_SCORE.
+        """
+        row = array("b", [NO_SCORE]) * 9
+        if not self.best_cells[rank]:
+            return row
+
+        packed = key_to_packed(self.keys[rank])
+        for cell in packed_moves(packed):
+            row[cell] = self.scores[self.rank(packed_canonical(packed_result(packed, cell)))]
+
+        return row
+
+    def nbytes(self):
+        return (self.keys.itemsize * len(self.keys) + self.best_cells.itemsize * len(self.best_cells)
+                + len(self.scores))
+
+
+def calculate_table():
+
+    states_encoded, scores, move_scores, best_moves = calculate()
+
+    return SolvedTable.from_solution(scores, best_moves)
+
+
+# Binary solution file, a header followed by the SolvedTable arrays (little-endian)
+# The header is padded to 32 bytes so the key and best cell arrays are aligned and can be used in place (see map_solution())
+# Bump SOLUTION_VERSION whenever the layout or the meaning of the stored scores changes
+SOLUTION_MAGIC = b"TTTS"
+SOLUTION_VERSION = 3
+# magic, format version, board cells, piece lifetime, max score, state count, crc32 of the arrays
+SOLUTION_HEADER = struct.Struct("<4sHBBBxII14x")
+SOLUTION_RULESET = (9, X, MAX_SCORE)
+
+
+def export_solution(table: SolvedTable, filename: str):
+    """
+    Writes a SolvedTable as a binary solution file.
+    The file is written next to its destination and renamed over it, readers never see a partial file.
+    """
+    keys = array("I", table.keys)
+    best_cells = array("H", table.best_cells)
+    if sys.byteorder == "big":
+        keys.byteswap()
+        best_cells.byteswap()
+    payload = keys.tobytes() + best_cells.tobytes() + table.scores.tobytes()
+    header = SOLUTION_HEADER.pack(SOLUTION_MAGIC, SOLUTION_VERSION, *SOLUTION_RULESET,
+                                  len(table), zlib.crc32(payload))
+
+    fd, tmp_name = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file owner-only
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, filename)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def _solution_sections(data, filename, verify=True):
+    """
+    Checks the header of a solution file buffer and returns the memoryviews of its keys, best cells
+    and scores sections.
+    Raises ValueError if the file is from another format version or ruleset, or is corrupted.
+    """
+    if len(data) < SOLUTION_HEADER.size:
+        raise ValueError(f"Solution file '{filename}' is truncated")
+
+    magic, version, cells, lifetime, max_score, count, checksum = SOLUTION_HEADER.unpack_from(data)
+    if magic != SOLUTION_MAGIC:
+        raise ValueError(f"'{filename}' is not a solution file")
+    if version != SOLUTION_VERSION:
+        raise ValueError(f"Solution file version {version}, expected {SOLUTION_VERSION}")
+    if (cells, lifetime, max_score) != SOLUTION_RULESET:
+        raise ValueError(f"Solution file ruleset {(cells, lifetime, max_score)}, expected {SOLUTION_RULESET}")
+
+    payload = memoryview(data)[SOLUTION_HEADER.size:]
+    sizes = (count * 4, count * 2, count)
+    if len(payload) != sum(sizes) or (verify and zlib.crc32(payload) != checksum):
+        raise ValueError(f"Solution file '{filename}' is corrupted")
+
+    offset = 0
+    sections = []
+    for size in sizes:
+        sections.append(payload[offset:offset + size])
+        offset += size
+
+    return sections
+
+
+def load_solution(filename: str) -> SolvedTable:
+    """
+    Reads a binary solution file written by export_solution() into arrays.
+    Raises ValueError if the file is from another format version or ruleset, or is corrupted.
+    """
+    with open(filename, "rb") as f:
+        data = f.read()
+
+    sections = _solution_sections(data, filename)
+
+    keys = array("I")
+    keys.frombytes(sections[0])
+    best_cells = array("H")
+    best_cells.frombytes(sections[1])
+    if sys.byteorder == "big":
+        keys.byteswap()
+        best_cells.byteswap()
+    scores = array("b")
+    scores.frombytes(sections[2])
+
+    return SolvedTable(keys, best_cells, scores)
+
+
+def map_solution(filename: str, verify=False) -> SolvedTable:
+    """
+    Maps a binary solution file read-only and returns a SolvedTable queried in place through memoryviews.
+    Nothing is copied, processes mapping the same file share its pages and the cost does not grow with the table.
+    The checksum is only checked with verify, it reads the whole file.
+    Raises ValueError like load_solution().
+    """
+    if sys.byteorder == "big":
+        # The arrays are stored little-endian
+        return load_solution(filename)
+
+    with open(filename, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    keys, best_cells, scores = _solution_sections(data, filename, verify)
+
+    # The memoryviews keep the mapping alive
+    return SolvedTable(keys.cast("I"), best_cells.cast("H"), scores.cast("b"))
+
+
 def export_to_c(bytes: list[bytes], var_name: str, filename: str):
     """
     Exports a list of bytes objects as a C header file
@@ -617,6 +1478,10 @@ def export_to_c(bytes: list[bytes], var_name: str, filename: str):
             # 5. Close the header guard
             f.write(f"#endif // {header_guard}\n")
 
+        # Same records as raw bytes, read by tactictoe_compact.load_records()
+        with open(os.path.splitext(filename)[0] + ".bin", "wb") as f:
+            f.write(b"".join(bytes))
+
         print(f"Successfully exported data to '{filename}'")
 
     except IOError as e:
@@ -666,8 +1531,9 @@ if __name__ == "__main__":
     board_flat = flatten_board(initial_state()["board"])
     pprint([(score, move, decodeState(state)) for move, score, state in move_scores[encodeState(board_flat, X)]])
 
-    # Export to json for web version
-    # export_to_json(scores, best_moves, "tactictoe_states.json")
+    # Export to json for web version, the X and O swapped states are stored once (see canonicalize_colors())
+    # _, web_scores, _, web_best_moves = calculate(color_swap=True)
+    # export_to_json(web_scores, web_best_moves, "tactictoe_states.json")
 
 
     # Optimise the size of the states into bytes
@@ -0,0 +1,98 @@
+"""
+Move ordering for the minimax / negamax engines
+"""
+
+from transposition import NO_ACTION
+
+WIN_LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))
+
+# Masks of the 2 other cells of every line through a cell
+LINE_PAIRS = tuple(
+    tuple(sum(1 << other for other in line if other != cell) for line in WIN_LINES if cell in line)
+    for cell in range(9)
+)
+
+# Priorities of the move classes, above any history score
+TT_PRIORITY = 1 << 40
+WIN_PRIORITY = 1 << 39
+BLOCK_PRIORITY = 1 << 38
+KILLER_PRIORITY = 1 << 37
+
+MAX_PLY = 128
+
+
+def completing_cells(owned, empty):
+    """
+    Returns the mask of the empty cells that complete a line with 2 owned cells (both 9 bit cell masks).
+    """
+    cells = 0
+    for cell in range(9):
+        if empty >> cell & 0x01:
+            for pair in LINE_PAIRS[cell]:
+                if owned & pair == pair:
+                    cells |= 1 << cell
+                    break
+
+    return cells
+
+
+class MoveOrderer:
+    """
+    Orders the moves of a node: the transposition table move, immediate wins, blocks of the opponent's
+    immediate wins, the 2 killer moves of the ply, then by history score.
+    Killers and history are learnt from the moves that cause a beta cutoff (see cutoff()).
+    Sides are 0 for X and 1 for O, moves are (i, j).
+    """
+
+    __slots__ = ("killers", "history")
+
+    def __init__(self):
+        self.clear()
+
+    def order(self, moves, ply, side, tt_action=NO_ACTION, wins=0, blocks=0):
+        """
+        Returns the moves sorted best first, moves of the same priority keep their order.
+        tt_action is a cell, wins and blocks are cell masks.
+        """
+        killers = self.killers[ply] if ply < MAX_PLY else (None, None)
+        history = self.history[side]
+
+        def priority(move):
+            cell = move[0]*3 + move[1]
+            value = history[cell]
+            if cell == tt_action:
+                value += TT_PRIORITY
+            if wins >> cell & 0x01:
+                value += WIN_PRIORITY
+            elif blocks >> cell & 0x01:
+                value += BLOCK_PRIORITY
+            if move == killers[0]:
+                value += KILLER_PRIORITY
+            elif move == killers[1]:
+                value += KILLER_PRIORITY // 2
+            return value
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def cutoff(self, move, ply, side, depth):
+        """
+        Records a move that caused a beta cutoff at depth (remaining plies).
+        """
+        if ply < MAX_PLY and self.killers[ply][0] != move:
+            self.killers[ply][1] = self.killers[ply][0]
+            self.killers[ply][0] = move
+        self.history[side][move[0]*3 + move[1]] += depth * depth
+
+    def clear(self):
+        """
+        Forgets the killers and the history.
+        """
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [[0] * 9, [0] * 9]
+
+    def new_search(self):
+        """
+        Forgets the killers and halves the history, call it before each move is searched.
+        """
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [[score // 2 for score in scores] for scores in self.history]
@@ -5,7 +5,8 @@ import time
 # import tictactoe as ttt
 import tactictoe_precalculated as ttt
 
-ttt.init()
+# Loads in the background, the window shows a loading title until it is ready
+ttt.init_async()
 MOVE_DELAY = 2
 RESET_DELAY = 4
 
@@ -35,6 +36,15 @@ while True:
 
     screen.fill(black)
 
+    if not ttt.ready():
+        title = largeFont.render("Loading solution...", True, white)
+        titleRect = title.get_rect()
+        titleRect.center = ((width / 2), (height / 2))
+        screen.blit(title, titleRect)
+        pygame.display.flip()
+        time.sleep(0.05)
+        continue
+
     # Let user choose a player.
     if user is None:
         user = ttt.X
@@ -46,6 +56,7 @@ while True:
         tile_origin = (width / 2 - (1.5 * tile_size),
                        height / 2 - (1.5 * tile_size))
         tiles = []
+        cell_scores = ttt.move_scores(state)
         for i in range(3):
             row = []
             for j in range(3):
@@ -72,7 +83,7 @@ while True:
                 # --- Display score number in bottom-right ---
                 if state["board"][i][j] == ttt.EMPTY:
                     # Render the text
-                    move_score_str = ttt.getStateScore(ttt.result(state, (i, j)))
+                    move_score_str = str(cell_scores[i*3 + j] if cell_scores[i*3 + j] is not None else "")
                     right_num_surface = smallFont.render(move_score_str, True, white)
                     # Get the rectangle of the rendered text
                     right_num_rect = right_num_surface.get_rect()
@@ -6,7 +6,9 @@ import math
 import time
 import random
 from copy import deepcopy
-from pprint import pp
+
+from transposition import TranspositionTable, EXACT, UPPERBOUND, LOWERBOUND, NO_ACTION
+from move_ordering import MoveOrderer, completing_cells
 
 
 X = 6
@@ -54,11 +56,31 @@ def actions(board):
             if cell == EMPTY:
                 moves.append((i,j))
 
-    random.shuffle(moves)
-
     return moves
 
 
+def threatCells(board):
+    """
+    Returns the cell masks (wins, blocks) of the player to move: the moves that win now, and the
+    moves that take a cell where the opponent would win on its next move.
+    Every move ages all pieces, a piece has to outlast 1 move to count for the player to move
+    and 2 moves to count for the opponent.
+    """
+    sign = 1 if player(board) == X else -1
+    own = 0
+    opponent = 0
+    empty = 0
+    for k, cell in enumerate(cell for row in board for cell in row):
+        if cell == EMPTY:
+            empty |= 1 << k
+        elif cell * sign >= 2:
+            own |= 1 << k
+        elif cell * sign <= -3:
+            opponent |= 1 << k
+
+    return (completing_cells(own, empty), completing_cells(opponent, empty))
+
+
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
@@ -143,8 +165,10 @@ def utility(board):
 callcount = 0
 MAX_DEPTH = 15
 
-# A dictionary to store scores of evaluated states
-transposition_table = {}
+# Scores of evaluated states, keyed by the hash of hashBoard() (2 * 2**18 entries, 8 MB)
+transposition_table = TranspositionTable(18)
+# Killer moves and history scores of the searched moves, see eval()
+move_orderer = MoveOrderer()
 
 def minimax(board):
     """
@@ -152,6 +176,8 @@ def minimax(board):
     """
     global callcount
     callcount = 0
+    transposition_table.new_search()
+    move_orderer.new_search()
 
     startTime = time.time() 
 
@@ -161,7 +187,7 @@ def minimax(board):
     maxPlayer = True if player(board) == X else False
     print("\n" + ("MaxPlayer" if maxPlayer else "MinPlayer"))
     optScore  = -math.inf if maxPlayer else math.inf
-    optAction = None
+    optActions = list()
 
     path = list()
     validMoves = list(actions(board))
@@ -174,16 +200,21 @@ def minimax(board):
         # Starts the recursive function and get the optimal action
         score, _, _ = eval(boardResult, path, MAX_DEPTH, alpha=alpha, beta=beta, table=transposition_table)
 
+        # Every root action gets an exact score, equally good actions are collected to pick one at random
         if maxPlayer:
             if score > optScore:
                 optScore = score
-                optAction = action
+                optActions = [action]
+            elif score == optScore:
+                optActions.append(action)
             # alpha = max(alpha, score)
             
         else:
             if score < optScore:
                 optScore = score
-                optAction = action
+                optActions = [action]
+            elif score == optScore:
+                optActions.append(action)
             # beta = min(beta, score)
 
         # if alpha >= beta:
@@ -191,12 +222,13 @@ def minimax(board):
 
         print(f"{score}: {action}  {alpha}/{beta}")
 
+    optAction = random.choice(optActions) if optActions else None
+
     # Print the callcount to measure the effect of ab pruning
     print("callcount:", callcount)
     print(f"Calculation Time: {(time.time() - startTime):.4f}s")
     print(f"OPT -> Score: {optScore}, Move: {optAction}")
-    print(len(transposition_table))
-    pp([(state, value) for state, value in transposition_table.items() if value["score"] != 3])
+    print(transposition_table.stats())
 
     # return optimal action
     return optAction
@@ -224,22 +256,21 @@ def eval(board, path, depth, alpha, beta, table):
         print(f"{indent}Depth {depth}: Player {player(board)}, Alpha={alpha}, Beta={beta}, Board={board}")
     # --- END VISUALIZATION CODE ---
 
-    EXACT = 0
-    UPPERBOUND = 1
-    LOWERBOUND = 2
-
     alphaOrig = alpha
     betaOrig = beta
     isValid = False
 
     boardHashed = hashBoard(board)
-
-    if boardHashed in table:
-        entry = table[boardHashed]
-        if entry["depth"] >= depth:     
-            score = entry["score"]
-            flag = entry["flag"]
-            action = entry["action"]
+    # 64 bit table key of the board tuple
+    boardKey = hash(boardHashed) & 0xFFFFFFFFFFFFFFFF
+
+    ttAction = NO_ACTION
+    entry = table.probe(boardKey)
+    if entry is not None:
+        score, action, entryDepth, flag = entry
+        ttAction = action
+        if entryDepth >= depth:
+            action = divmod(action, 3) if action != NO_ACTION else None
             if flag == EXACT:
                 if indent_level < INDENT_MAX: 
                     print(f"{indent}L--> TABLE EXACT: Returning Score: {score}, Best Move: {action}, {boardHashed}")
@@ -279,7 +310,7 @@ def eval(board, path, depth, alpha, beta, table):
     optAction = None        # Set optimal action as none since none has been explored yet
 
     path.append(boardHashed)
-    validMoves = list(actions(board))
+    validMoves = move_orderer.order(actions(board), indent_level, 0 if maxPlayer else 1, ttAction, *threatCells(board))
 
     # Iterate over each actions available
     for action in validMoves:
@@ -296,6 +327,7 @@ def eval(board, path, depth, alpha, beta, table):
                 isValid = isNextValid
             alpha = max(alpha, optScore)
             if optScore >= beta:
+                move_orderer.cutoff(action, indent_level, 0, depth)
                 if indent_level < INDENT_MAX: 
                     print(f"{indent}--> PRUNING! (Alpha={alpha}, Beta={beta})")
                 break
@@ -308,36 +340,34 @@ def eval(board, path, depth, alpha, beta, table):
                 isValid = isNextValid
             beta = min(beta, optScore)
             if optScore <= alpha:
+                move_orderer.cutoff(action, indent_level, 1, depth)
                 if indent_level < INDENT_MAX: 
                     print(f"{indent}--> PRUNING! (Alpha={alpha}, Beta={beta})")
                 break
 
     path.pop(-1)
 
+    flag = None
     if isValid:
-        entry = {}
-        entry["score"] = optScore
-        entry["action"] = optAction 
-        entry["depth"] = depth    
         if maxPlayer:
             if optScore <= alphaOrig:
-                entry["flag"] = UPPERBOUND
+                flag = UPPERBOUND
             elif optScore >= beta:
-                entry["flag"] = LOWERBOUND
+                flag = LOWERBOUND
             else:
-                entry["flag"] = EXACT
+                flag = EXACT
         else:
             if optScore >= betaOrig:
-                entry["flag"] = LOWERBOUND
+                flag = LOWERBOUND
             elif optScore <= alpha:
-                entry["flag"] = UPPERBOUND
+                flag = UPPERBOUND
             else:
-                entry["flag"] = EXACT
-        table[boardHashed] = entry
+                flag = EXACT
+        table.store(boardKey, optScore, optAction[0]*3 + optAction[1], depth, flag)
 
     # Final print showing what this level is returning
     if indent_level < INDENT_MAX: 
-        print(f"{indent}L--> Returning Score: {optScore}, Best Move: {optAction}, {boardHashed}, Flag: {entry['flag']}")
+        print(f"{indent}L--> Returning Score: {optScore}, Best Move: {optAction}, {boardHashed}, Flag: {flag}")
     
     return (optScore, optAction, isValid)
 
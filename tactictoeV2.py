@@ -8,10 +8,22 @@ import random
 from copy import deepcopy
 from pprint import pp
 
+from transposition import TranspositionTable, EXACT, UPPERBOUND, LOWERBOUND, NO_ACTION
+from move_ordering import MoveOrderer, completing_cells
+
 X = 3
 O = -3
 EMPTY = 0
 
+# Zobrist keys, one random 64 bit int per (cell, cell value) and one for X to move
+# The key of a state is the XOR of the keys of its cells, result() updates it for the cells that change
+_zobrist_random = random.Random(0x7AC7)
+ZOBRIST_CELLS = tuple(
+    tuple(0 if value == EMPTY else _zobrist_random.getrandbits(64) for value in range(O, X + 1))
+    for cell in range(9)
+)
+ZOBRIST_TURN = _zobrist_random.getrandbits(64)
+
 
 def initial_state():
     """
@@ -21,7 +33,8 @@ def initial_state():
         "turn": X,
         "board":   [[EMPTY, EMPTY, EMPTY],
                     [EMPTY, EMPTY, EMPTY],
-                    [EMPTY, EMPTY, EMPTY]]
+                    [EMPTY, EMPTY, EMPTY]],
+        "hash": ZOBRIST_TURN,
     }
 
     return state
@@ -45,36 +58,61 @@ def actions(state):
         for j, cell in enumerate(row):
             if cell == EMPTY:
                 moves.append((i,j))
-    
-    random.shuffle(moves)
 
     return moves
 
 
+def threatCells(state):
+    """
+    Returns the cell masks (wins, blocks) of the player to move: the moves that win now, and the
+    moves that take a cell where the opponent would win on its next move.
+    A piece with 1 move left is gone when its owner moves, so it does not count for its owner.
+    """
+    sign = 1 if state["turn"] == X else -1
+    own = 0
+    opponent = 0
+    empty = 0
+    for k, cell in enumerate(cell for row in state["board"] for cell in row):
+        if cell == EMPTY:
+            empty |= 1 << k
+        elif cell * sign >= 2:
+            own |= 1 << k
+        elif cell * sign <= -2:
+            opponent |= 1 << k
+
+    return (completing_cells(own, empty), completing_cells(opponent, empty))
+
+
 def result(state, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
     newboard = deepcopy(state["board"])
     player = state["turn"]
+    key = stateKey(state) ^ ZOBRIST_TURN
 
     if player == X:
         for i in range(3):
             for j in range(3):
                 if newboard[i][j] > 0:
+                    key ^= ZOBRIST_CELLS[i*3 + j][newboard[i][j] - O]
                     newboard[i][j] -= 1
+                    key ^= ZOBRIST_CELLS[i*3 + j][newboard[i][j] - O]
         nextPlayer = O
 
     else:
         for i in range(3):
             for j in range(3):
                 if newboard[i][j] < 0:
+                    key ^= ZOBRIST_CELLS[i*3 + j][newboard[i][j] - O]
                     newboard[i][j] += 1
+                    key ^= ZOBRIST_CELLS[i*3 + j][newboard[i][j] - O]
         nextPlayer = X
 
     i, j = action
     if state["board"][i][j] == EMPTY:
         newboard[i][j] = player
+        key ^= ZOBRIST_CELLS[i*3 + j][player - O]
     else:
         print(state["board"])
         print(action)
@@ -83,6 +121,7 @@ def result(state, action):
     newState = {
         "turn": nextPlayer,
         "board": newboard,
+        "hash": key,
     }
 
     return newState
@@ -147,80 +186,162 @@ def utility(state, depth):
 callcount = 0
 MAX_DEPTH = 15
 
-# A dictionary to store scores of evaluated states
-transposition_table = {}
+# Score of a win on the next move, each ply further away scores 1 less (see eval())
+WIN_SCORE = 100
 
-def negamax(state):
-    """
-    Returns the optimal action for the current player on the board.
-    """
-    global callcount
-    callcount = 0
+# Search budget of each AI move, negamax() deepens the search until one of them runs out
+TIME_BUDGET = 1.0       # seconds
+NODE_BUDGET = None      # eval() calls, None for no limit
 
-    startTime = time.time() 
+# Search of each depth:
+# - "alphabeta": full window alpha-beta inside an aspiration window
+# - "pvs": principal variation search, the moves after the first are searched with a null window
+#   and only searched again with the full window when they turn out better
+# - "mtdf": MTD(f), a series of null window searches converging on the score of the previous depth
+SEARCH_MODES = ("alphabeta", "pvs", "mtdf")
+SEARCH_MODE = "alphabeta"
+# Half width of the window searched around the score of the previous depth
+ASPIRATION_WINDOW = 2
 
-    # # random move
-    # return random.choice(list(actions(board)))
+# Scores of evaluated states, keyed by the Zobrist key of the state (2 * 2**18 entries, 8 MB)
+transposition_table = TranspositionTable(18)
+# Killer moves and history scores, see orderMoves()
+move_orderer = MoveOrderer()
 
-    maxPlayer = True if player(state) == X else False
-    print("\n" + ("MaxPlayer" if maxPlayer else "MinPlayer"))
-    optScore  = -math.inf if maxPlayer else math.inf
-    optAction = None
-    sign = -1 if maxPlayer else 1
+# Limits of the running search, checked by eval()
+deadline = math.inf
+node_limit = math.inf
 
-    path = list()
-    validMoves = list(actions(state))
-    alpha = -math.inf*sign
-    beta = math.inf*sign
 
-    for action in validMoves:
-        boardResult = result(state, action)
+class SearchAborted(Exception):
+    """
+    Raised by eval() when the search budget runs out.
+    """
 
-        # Starts the recursive function and get the optimal action
-        score, _ = eval(boardResult, path, MAX_DEPTH, alpha=alpha, beta=beta, sign=sign, table=transposition_table)
-        score = -score
 
-        if score > optScore:
-            optScore = score
-            optAction = action
+def negamax(state, time_budget=TIME_BUDGET, node_budget=NODE_BUDGET, mode=SEARCH_MODE):
+    """
+    Returns the optimal action for the current player on the board.
+    Iterative deepening: depth 1, 2, ... MAX_DEPTH are searched until the time or node budget runs out,
+    the action of the last completed depth is returned. mode is one of SEARCH_MODES.
+    """
+    global callcount, deadline, node_limit
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+
+    callcount = 0
+    transposition_table.new_search()
+    move_orderer.new_search()
 
-        print(f"{score}: {action}  {alpha}/{beta}")
+    startTime = time.time() 
+    deadline = time.perf_counter() + time_budget if time_budget is not None else math.inf
+    node_limit = node_budget if node_budget is not None else math.inf
+
+    maxPlayer = True if player(state) == X else False
+    print("\n" + ("MaxPlayer" if maxPlayer else "MinPlayer") + f" ({mode})")
+    sign = 1 if maxPlayer else -1
+
+    # Any legal move if not even depth 1 completes
+    optScore = None
+    optAction = actions(state)[0]
+
+    try:
+        for depth in range(1, MAX_DEPTH + 1):
+            if mode == "mtdf":
+                optScore, optAction = mtdf(state, depth, optScore if optScore is not None else 0, sign)
+                print(f"Depth {depth}: {optScore}, {optAction}  ({callcount} calls)")
+                if abs(optScore) >= WIN_SCORE - depth:
+                    break
+                continue
+
+            # Aspiration window around the previous score, widened on the side the score falls out of
+            if optScore is None:
+                alpha, beta = -math.inf, math.inf
+            else:
+                alpha, beta = optScore - ASPIRATION_WINDOW, optScore + ASPIRATION_WINDOW
+
+            while True:
+                score, action = eval(state, list(), depth, alpha, beta, sign, transposition_table,
+                                     pvs=(mode == "pvs"))
+                if score <= alpha:
+                    alpha = -math.inf
+                elif score >= beta:
+                    beta = math.inf
+                else:
+                    break
+
+            optScore, optAction = score, action
+            print(f"Depth {depth}: {optScore}, {optAction}  ({callcount} calls)")
+
+            # A forced win or loss found within the depth does not change with more depth
+            if abs(optScore) >= WIN_SCORE - depth:
+                break
+
+    except SearchAborted:
+        print(f"Budget reached at depth {depth}")
+
+    finally:
+        # Also on any other error, a later eval() call must not see this search's budget
+        deadline = math.inf
+        node_limit = math.inf
 
     # Print the callcount to measure the effect of ab pruning
     print("callcount:", callcount)
     print(f"Calculation Time: {(time.time() - startTime):.4f}s")
     print(f"OPT -> Score: {optScore}, Move: {optAction}")
-    print(len(transposition_table))
-    # pp([(state, value) for state, value in transposition_table.items() if value["depth"] == MAX_DEPTH])
+    print(transposition_table.stats())
 
     # return optimal action
     return optAction
 
 
+def mtdf(state, depth, guess, sign):
+    """
+    MTD(f): searches the state with null windows around guess until the lower and upper bounds meet.
+    Returns the score and the optimal action like eval(), the action is the one of the last search that
+    proved a lower bound.
+    """
+    lower, upper = -math.inf, math.inf
+    score = guess
+    optAction = None
+
+    while lower < upper:
+        beta = score + 1 if score == lower else score
+        score, action = eval(state, list(), depth, beta - 1, beta, sign, transposition_table)
+        if score < beta:
+            upper = score
+        else:
+            lower = score
+            optAction = action
+        optAction = optAction or action
 
-def eval(state, path, depth, alpha, beta, sign, table):
+    return (score, optAction)
+
+
+def eval(state, path, depth, alpha, beta, sign, table, ply=0, pvs=False):
     """
-    Recursive function that evaluates until it reaches terminal board
-    It uses the otherBranchScore argument to keep track of the other min/max of the other branch on the same parent that has been explored
-    Returns optimal action and the score for the board
+    Recursive function that evaluates until it reaches terminal board or the depth limit
+    Scores are for the player to move (sign is 1 for X, -1 for O): a win ply moves away scores WIN_SCORE - ply,
+    the depth limit scores 0
+    With pvs, the moves after the first are searched with a null window first (see SEARCH_MODES)
+    Returns the score and the optimal action for the board
     """
     global callcount
     callcount += 1
-
-    EXACT = 0
-    UPPERBOUND = 1
-    LOWERBOUND = 2
+    if callcount >= node_limit or time.perf_counter() >= deadline:
+        raise SearchAborted()
 
     alphaOrig = alpha
 
-    boardHashed = hashBoard(state)
+    boardHashed = stateKey(state)
 
-    if boardHashed in table:
-        entry = table[boardHashed]
-        if entry["depth"] >= depth:     
-            score = entry["score"]
-            flag = entry["flag"]
-            action = entry["action"]
+    entry = table.probe(boardHashed)
+    ttAction = NO_ACTION
+    if entry is not None:
+        score, ttAction, entryDepth, flag = entry
+        if entryDepth >= depth and ply > 0:
+            score = scoreFromTable(score, ply)
+            action = divmod(ttAction, 3) if ttAction != NO_ACTION else None
             if flag == EXACT:
                 return (score, action)
             elif flag == LOWERBOUND and score >= beta:
@@ -234,7 +355,7 @@ def eval(state, path, depth, alpha, beta, sign, table):
 
     # If terminal board, just return the utility as score and None as optimal Action
     if terminal(state):
-        score = utility(state, depth)
+        score = utility(state, WIN_SCORE - ply) * sign
         return (score, None)
     
     if depth == 0:
@@ -245,47 +366,98 @@ def eval(state, path, depth, alpha, beta, sign, table):
     optAction = None        # Set optimal action as none since none has been explored yet
 
     path.append(boardHashed)
-    validMoves = actions(state)
+    validMoves = orderMoves(state, ttAction, ply)
+    side = 0 if sign == 1 else 1
 
     # Iterate over each actions available
     for action in validMoves:
         boardResult = result(state, action)
         
         # Call eval() for the resulting board from the action
-        score, optNextAction = eval(boardResult, path, depth - 1, alpha=-beta, beta=-alpha, sign=-sign, table=table)
-        score = -score
+        if pvs and optAction is not None:
+            # Null window: only proves whether the move beats alpha, searched again if it does
+            score, optNextAction = eval(boardResult, path, depth - 1, alpha=-alpha - 1, beta=-alpha, sign=-sign, table=table, ply=ply + 1, pvs=pvs)
+            score = -score
+            if alpha < score < beta:
+                score, optNextAction = eval(boardResult, path, depth - 1, alpha=-beta, beta=-alpha, sign=-sign, table=table, ply=ply + 1, pvs=pvs)
+                score = -score
+        else:
+            score, optNextAction = eval(boardResult, path, depth - 1, alpha=-beta, beta=-alpha, sign=-sign, table=table, ply=ply + 1, pvs=pvs)
+            score = -score
 
         if score > optScore:
             optScore = score
             optAction = action
         alpha = max(alpha, score)
         if alpha >= beta:
+            move_orderer.cutoff(action, ply, side, depth)
             break
 
     path.pop(-1)
 
-    entry = {}
-    entry["score"] = optScore
-    entry["action"] = optAction 
-    entry["depth"] = depth    
     if optScore <= alphaOrig:
-        entry["flag"] = UPPERBOUND
+        flag = UPPERBOUND
     elif optScore >= beta:
-        entry["flag"] = LOWERBOUND
+        flag = LOWERBOUND
     else:
-        entry["flag"] = EXACT
-    table[boardHashed] = entry
+        flag = EXACT
+    table.store(boardHashed, scoreToTable(optScore, ply), optAction[0]*3 + optAction[1], depth, flag)
 
     return (optScore, optAction)
 
 
+def orderMoves(state, ttAction, ply):
+    """
+    Returns the actions of the state ordered by move_orderer, best first.
+    The root actions are shuffled first, so the first of equally good moves found is a random one.
+    """
+    wins, blocks = threatCells(state)
+    side = 0 if state["turn"] == X else 1
+
+    validMoves = actions(state)
+    if ply == 0:
+        random.shuffle(validMoves)
+
+    return move_orderer.order(validMoves, ply, side, ttAction, wins, blocks)
+
+
+def scoreToTable(score, ply):
+    # Win scores are stored relative to the state instead of the root of the search
+    if score > 0:
+        return score + ply
+    if score < 0:
+        return score - ply
+    return score
+
+
+def scoreFromTable(score, ply):
+    if score > 0:
+        return score - ply
+    if score < 0:
+        return score + ply
+    return score
+
+
 def hashBoard(state):
-    
-    hash = [cell for row in state["board"] for cell in row]
-    hash.append(state["turn"])
-    hashable_version = tuple(hash)
-    
-    return hashable_version
+    """
+    Returns the 64 bit Zobrist key of the state, computed from every cell.
+    """
+    key = ZOBRIST_TURN if state["turn"] == X else 0
+    for i, row in enumerate(state["board"]):
+        for j, cell in enumerate(row):
+            key ^= ZOBRIST_CELLS[i*3 + j][cell - O]
+
+    return key
+
+
+def stateKey(state):
+    """
+    Returns the Zobrist key of the state, kept up to date by result() so it is only computed for states built elsewhere.
+    """
+    if "hash" in state:
+        return state["hash"]
+
+    return hashBoard(state)
 
 
 def checkSymmetry(board, move1, move2):
@@ -0,0 +1,211 @@
+"""
+Tic Tac Toe Player
+Plays from the size optimized records of tactictoe_states.h, the same data the microcontroller uses.
+"""
+
+import calculation as clc
+
+import os
+import re
+import random
+
+# Same state dicts as tactictoe_precalculated, its helpers are not imported so that starting up
+# only loads calculation
+from calculation import initial_state, player, result
+
+X = 3
+O = -3
+EMPTY = 0
+
+# Bytes 0 to 2 -> canonical state locations, byte 3 -> best move X / O, bytes 4, 5 -> score X / O (see clc.storeMoves)
+RECORD_SIZE = 6
+STATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tactictoe_states.h")
+
+# optimizeSize() drops the states within 9 moves of a win, they are searched this many plies deep
+# before falling back to the records (8 plies find a best move for all of them)
+SEARCH_DEPTH = 8
+WIN_SCORE = 18
+
+# Sorted records of every stored state, a single bytes buffer, loaded on first lookup
+records = None
+
+
+def actions(state):
+    """
+    Returns list of all possible actions (i, j) available on the board.
+    """
+    moves = [(i, j) for i, row in enumerate(state["board"]) for j, cell in enumerate(row) if cell == EMPTY]
+    random.shuffle(moves)
+
+    return moves
+
+
+def winner(state):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    return clc.winner(state) or None
+
+
+def terminal(state):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return winner(state) is not None
+
+
+def load_records(filename=STATES_FILE):
+    """
+    Returns the records of a header written by clc.export_to_c() as one bytes buffer.
+    The sibling .bin file written with the header is read directly unless it is older than the header,
+    otherwise the header is parsed.
+    """
+    bin_filename = os.path.splitext(filename)[0] + ".bin"
+    if os.path.exists(bin_filename) and os.path.getmtime(bin_filename) >= os.path.getmtime(filename):
+        with open(bin_filename, "rb") as f:
+            data = f.read()
+    else:
+        with open(filename) as f:
+            text = f.read()
+        array_start = text.index("{", text.index(f"[][{RECORD_SIZE}]"))
+        array_end = text.index("};", array_start)
+        data = bytes(int(value, 16) for value in re.findall(r"0x([0-9a-fA-F]{2})", text[array_start:array_end]))
+
+    if len(data) % RECORD_SIZE:
+        raise ValueError(f"'{filename}' does not hold {RECORD_SIZE} byte records")
+
+    return data
+
+
+def init(filename=STATES_FILE):
+    global records
+    records = load_records(filename)
+
+
+def lookup(state_key):
+    """
+    Returns (best canonical cell, score) of a canonical state key, None if the state is not stored.
+    """
+    if records is None:
+        init()
+
+    location_bytes = (state_key >> 8).to_bytes(3, "big")
+
+    # Binary search of the record holding the state locations
+    low, high = 0, len(records) // RECORD_SIZE
+    while low < high:
+        middle = (low + high) // 2
+        if records[middle*RECORD_SIZE:middle*RECORD_SIZE + 3] < location_bytes:
+            low = middle + 1
+        else:
+            high = middle
+
+    offset = low * RECORD_SIZE
+    if records[offset:offset + 3] != location_bytes:
+        return None
+
+    if state_key & 0x01:
+        best_cell, score = records[offset + 3] >> 4, records[offset + 4]
+    else:
+        best_cell, score = records[offset + 3] & 0x0F, records[offset + 5]
+
+    # The other turn of a stored board is not always stored
+    if best_cell == clc.NO_MOVE:
+        return None
+
+    return (best_cell, score - 256 if score > 127 else score)
+
+
+def _relative_score(score, ply):
+    # A score found ply moves ahead, moved ply steps toward 0 like the solver does for each move
+    if score > 0:
+        return max(score - ply, 0)
+    if score < 0:
+        return min(score + ply, 0)
+    return 0
+
+
+def search(packed, ply, depth, alpha, beta, path):
+    """
+    Returns the score of a packed state, seen from ply moves ahead, with alpha-beta minimax.
+    Stored states and wins end the search, so does a repeated state or the depth limit (scored as a draw).
+    """
+    win_ner = clc.packed_winner(packed)
+    if win_ner:
+        return _relative_score(WIN_SCORE if win_ner == X else -WIN_SCORE, ply)
+
+    state_key = clc.packed_canonical(packed)
+    entry = lookup(state_key)
+    if entry is not None:
+        return _relative_score(entry[1], ply)
+
+    if depth == 0 or state_key in path:
+        return 0
+
+    path.add(state_key)
+    if packed & clc.TURN_BIT:
+        best_score = -clc.MAX_SCORE
+        for cell in clc.packed_moves(packed):
+            best_score = max(best_score, search(clc.packed_result(packed, cell), ply + 1, depth - 1, alpha, beta, path))
+            alpha = max(alpha, best_score)
+            if alpha >= beta:
+                break
+    else:
+        best_score = clc.MAX_SCORE
+        for cell in clc.packed_moves(packed):
+            best_score = min(best_score, search(clc.packed_result(packed, cell), ply + 1, depth - 1, alpha, beta, path))
+            beta = min(beta, best_score)
+            if alpha >= beta:
+                break
+    path.discard(state_key)
+
+    return best_score
+
+
+def search_moves(packed):
+    """
+    Returns {cell: score} of every move of a packed state that is not stored.
+    """
+    path = {clc.packed_canonical(packed)}
+    return {
+        cell: search(clc.packed_result(packed, cell), 1, SEARCH_DEPTH, -clc.MAX_SCORE, clc.MAX_SCORE, path)
+        for cell in clc.packed_moves(packed)
+    }
+
+
+def getBestMove(state):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    packed = clc.pack_state(state)
+    state_key, transform_id = clc.canonicalize(packed)
+
+    entry = lookup(state_key)
+    if entry is not None:
+        return divmod(clc.INVERSE_TRANSFORM_CELLS[transform_id][entry[0]], 3)
+
+    # Pruned state, searched on the real board
+    move_scores = search_moves(packed)
+    best_score = max(move_scores.values()) if state["turn"] == X else min(move_scores.values())
+
+    return divmod(random.choice([cell for cell, score in move_scores.items() if score == best_score]), 3)
+
+
+def getStateScore(state):
+
+    win_ner = winner(state)
+    if win_ner == None:
+        packed = clc.pack_state(state)
+        entry = lookup(clc.packed_canonical(packed))
+        if entry is not None:
+            return str(entry[1])
+        return str(search(packed, 0, SEARCH_DEPTH + 1, -clc.MAX_SCORE, clc.MAX_SCORE, set()))
+
+    elif win_ner == X:
+        return "WIN_X"
+
+    elif win_ner == O:
+        return "WIN_O"
+
+    else:
+        return ""
@@ -5,9 +5,13 @@ Tic Tac Toe Player
 import calculation as clc
 
 import math
+import os
+import threading
 import time
 import random
+from bisect import bisect_left
 from copy import deepcopy
+from concurrent.futures import Future
 from pprint import pp
 
 X = 3
@@ -15,15 +19,82 @@ O = -3
 EMPTY = 0
 
 
-states_encoded = set()
-scores = dict()
-move_scores = dict()
-best_moves = dict()
+# Array backed solution mapped from SOLUTION_FILE, see clc.SolvedTable
+# Set by the loader thread, use get_table() which waits for it
+table = None
+_table_future = None
+_table_lock = threading.Lock()
 
+# Solution cache, regenerated when missing or written by another format version / ruleset
+SOLUTION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tactictoe_solution.bin")
 
-def init():
-    global states_encoded, scores, move_scores, best_moves
-    states_encoded, scores, move_scores, best_moves = clc.calculate()
+
+def _load_table(filename):
+    """
+    Maps the solution file, solves the game and rewrites the file if it is missing, stale or corrupted.
+    """
+    try:
+        return clc.map_solution(filename, verify=True)
+    except FileNotFoundError:
+        print(f"No solution file '{filename}', calculating")
+    except ValueError as e:
+        print(f"{e}, calculating")
+
+    solved = clc.calculate_table()
+    try:
+        clc.export_solution(solved, filename)
+    except OSError as e:
+        print(f"Error writing solution file: {e}")
+
+    return solved
+
+
+def _load_worker(future, filename):
+    global table
+    try:
+        table = _load_table(filename)
+    except BaseException as e:
+        future.set_exception(e)
+    else:
+        future.set_result(table)
+
+
+def init_async(filename=SOLUTION_FILE):
+    """
+    Starts loading the solution on a background thread, only the first call starts it.
+    Returns a Future of the table, poll it with done() or use add_done_callback().
+    """
+    global _table_future
+    with _table_lock:
+        if _table_future is None:
+            _table_future = Future()
+            threading.Thread(target=_load_worker, args=(_table_future, filename),
+                             name="solution-loader", daemon=True).start()
+        return _table_future
+
+
+def init(filename=SOLUTION_FILE):
+    """
+    Loads the solution and waits for it.
+    """
+    init_async(filename).result()
+
+
+def ready():
+    """
+    Returns True once loading the solution has finished and queries no longer block.
+    If the loader failed, the queries (and get_table()) raise its error.
+    """
+    return table is not None or (_table_future is not None and _table_future.done())
+
+
+def get_table():
+    """
+    Returns the solution, starts loading it on first use and blocks until it is loaded.
+    """
+    if table is not None:
+        return table
+    return init_async().result()
 
 
 def initial_state():
@@ -143,53 +214,285 @@ def terminal(state):
     return False
 
 
+# Upper bounds (seconds) of the query latency histogram buckets, the last one catches the rest
+LATENCY_BUCKETS = (1e-6, 2e-6, 5e-6, 1e-5, 2e-5, 5e-5, 1e-4, 2e-4, 5e-4, 1e-3, 1e-2, 1e-1, math.inf)
+
+
+class QueryMetrics:
+    """
+    Latency histograms of the queries, table hit / miss counts and the number of canonicalizations.
+    Collected only while enabled, see enable_metrics().
+    """
+
+    __slots__ = ("latency_counts", "latency_sums", "latency_max", "hits", "misses", "canonicalizations", "lock")
+
+    def __init__(self):
+        self.latency_counts = {}
+        self.latency_sums = {}
+        self.latency_max = {}
+        self.hits = 0
+        self.misses = 0
+        self.canonicalizations = 0
+        self.lock = threading.Lock()
+
+    def observe(self, query, seconds, canonicalizations=1, hits=0, misses=0):
+        with self.lock:
+            if query not in self.latency_counts:
+                self.latency_counts[query] = [0] * len(LATENCY_BUCKETS)
+                self.latency_sums[query] = 0.0
+                self.latency_max[query] = 0.0
+            self.latency_counts[query][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            self.latency_sums[query] += seconds
+            self.latency_max[query] = max(self.latency_max[query], seconds)
+            self.hits += hits
+            self.misses += misses
+            self.canonicalizations += canonicalizations
+
+    def percentile(self, query, q):
+        """
+        Returns the upper bound of the bucket holding the q (0..1) latency percentile of a query.
+        """
+        counts = self.latency_counts[query]
+        rank = q * sum(counts)
+        total = 0
+        for bound, count in zip(LATENCY_BUCKETS, counts):
+            total += count
+            if total >= rank and count:
+                return bound if bound != math.inf else self.latency_max[query]
+        return 0.0
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "latency": {
+                    query: {
+                        "count": sum(counts),
+                        "sum": self.latency_sums[query],
+                        "p50": self.percentile(query, 0.50),
+                        "p95": self.percentile(query, 0.95),
+                        "p99": self.percentile(query, 0.99),
+                        "buckets": dict(zip(LATENCY_BUCKETS, counts)),
+                    }
+                    for query, counts in self.latency_counts.items()
+                },
+                "lookups": {"hit": self.hits, "miss": self.misses},
+                "canonicalizations": self.canonicalizations,
+            }
+
+    def to_prometheus(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        with self.lock:
+            lines = ["# TYPE tactictoe_query_latency_seconds histogram"]
+            for query, counts in self.latency_counts.items():
+                total = 0
+                for bound, count in zip(LATENCY_BUCKETS, counts):
+                    total += count
+                    le = "+Inf" if bound == math.inf else repr(bound)
+                    lines.append(f'tactictoe_query_latency_seconds_bucket{{query="{query}",le="{le}"}} {total}')
+                lines.append(f'tactictoe_query_latency_seconds_sum{{query="{query}"}} {self.latency_sums[query]}')
+                lines.append(f'tactictoe_query_latency_seconds_count{{query="{query}"}} {total}')
+
+            lines.append("# TYPE tactictoe_lookups_total counter")
+            lines.append(f'tactictoe_lookups_total{{result="hit"}} {self.hits}')
+            lines.append(f'tactictoe_lookups_total{{result="miss"}} {self.misses}')
+            lines.append("# TYPE tactictoe_canonicalizations_total counter")
+            lines.append(f"tactictoe_canonicalizations_total {self.canonicalizations}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Query metrics, None while disabled so the queries only pay one check
+# Each query reads it once, so it can be enabled / disabled while other threads are querying
+metrics = None
+
+
+def enable_metrics():
+    """
+    Starts collecting query metrics (from zero) and returns the QueryMetrics.
+    """
+    global metrics
+    metrics = QueryMetrics()
+    return metrics
+
+
+def disable_metrics():
+    global metrics
+    metrics = None
+
+
+# Random generator of each thread for the tie-breaks, the queries also take a random.Random of their own
+_thread_random = threading.local()
+
+
+def thread_random():
+    """
+    Returns the random.Random of the calling thread.
+    """
+    rng = getattr(_thread_random, "rng", None)
+    if rng is None:
+        rng = _thread_random.rng = random.Random()
+    return rng
+
+
 # callcount variable to track how many times eval() is called
 callcount = 0
 
 
-def getBestMove(state):
+def _state_rank(table, state_key, state, query, collector, start):
+    """
+    Returns the rank of a canonical state key, raises KeyError if the state is not in the table
+    (a state that cannot be reached from the initial state).
+    """
+    rank = table.rank(state_key)
+    if rank < 0:
+        if collector is not None:
+            collector.observe(query, time.perf_counter() - start, misses=1)
+        raise KeyError(f"State not in the solved table: {state}")
+    return rank
+
+
+def getBestMove(state, rng=None):
     """
     Returns the optimal action for the current player on the board.
+    Equally good moves are picked with rng, the generator of the calling thread by default.
     """
-    state_encoded = clc.get_canonical_form(state["board"], state["turn"])
+    collector = metrics
+    start = time.perf_counter() if collector is not None else 0.0
 
-    print(f"Eval Score: {scores[state_encoded]}")
+    table = get_table()
+    state_key, transform_id = clc.canonicalize(clc.pack_state(state))
+    rank = _state_rank(table, state_key, state, "getBestMove", collector, start)
 
-    best_move_canonical = random.choice(best_moves[state_encoded])  
-    new_state = result(clc.decodeState(state_encoded), best_move_canonical)
-    best_state_canonical = clc.get_canonical_form(new_state["board"], new_state["turn"])
+    best_move_cells = table.best_move_cells(rank)
+    if not best_move_cells:
+        raise ValueError(f"Terminal state has no moves: {state}")
 
-    valid_best_moves = []
-    for move in actions(state):
-        new_state = result(state, move)
-        # Check if the move results in the best canonical state
-        if clc.get_canonical_form(new_state["board"], new_state["turn"]) == best_state_canonical:
-            valid_best_moves.append(move)
+    # Every canonical cell with the best score, mapped back onto the real board
+    real_cells = clc.INVERSE_TRANSFORM_CELLS[transform_id]
+    best_move = divmod(real_cells[(rng or thread_random()).choice(best_move_cells)], 3)
 
-    # print(f"Valid Moves: {len(valid_best_moves)}")
-    return random.choice(valid_best_moves)
-    
+    if collector is not None:
+        collector.observe("getBestMove", time.perf_counter() - start, hits=1)
+    return best_move
 
-def getRandomMove(state):
 
-    state_encoded = clc.get_canonical_form(state["board"], state["turn"])
-    print(f"Eval Score: {scores[state_encoded]}")
+def move_scores(state):
+    """
+    Returns the score after each move as 9 entries indexed by cell k = i*3 + j.
+    A winning move is "WIN_X" or "WIN_O" like getStateScore(), an occupied cell is None.
+    Raises KeyError for a state that is not in the table, like getBestMove().
+    """
+    collector = metrics
+    start = time.perf_counter() if collector is not None else 0.0
+
+    table = get_table()
+    packed = clc.pack_state(state)
+    state_key, transform_id = clc.canonicalize(packed)
+    rank = _state_rank(table, state_key, state, "move_scores", collector, start)
+
+    scores = [None] * 9
 
-    return random.choice(list(actions(state)))
+    # Stored by canonical cell
+    row = table.move_score_row(rank)
+    canonical_cells = clc.TRANSFORM_CELLS[transform_id]
+
+    for cell in clc.packed_moves(packed):
+        score = row[canonical_cells[cell]]
+        if score != clc.NO_SCORE:
+            scores[cell] = score
+
+    # A winning move always has the best score of the row, only those need the winner check
+    played = [score for score in scores if score is not None]
+    if played:
+        best_score = max(played) if state["turn"] == X else min(played)
+        for cell, score in enumerate(scores):
+            if score == best_score and clc.packed_winner(clc.packed_result(packed, cell)):
+                scores[cell] = "WIN_X" if state["turn"] == X else "WIN_O"
+
+    if collector is not None:
+        # move_score_row() canonicalizes every child
+        collector.observe("move_scores", time.perf_counter() - start, canonicalizations=1 + len(played), hits=1)
+    return scores
+
+
+def batch_best_moves(boards, turns):
+    """
+    Returns (scores, best_cells) of a batch of states as int8 arrays.
+    boards is an (N, 9) int8 array of the board cells (k = i*3 + j), turns is an N array of X / O.
+    best_cells are cells of the real boards, divmod(cell, 3) is the move; the same stored best move
+    is returned for equal states. States that are terminal or not in the table get clc.NO_MOVE and
+    the missing ones also get clc.NO_SCORE.
+    """
+    np = clc.load_numpy("batch_best_moves()")
+
+    collector = metrics
+    start = time.perf_counter() if collector is not None else 0.0
+
+    table = get_table()
+    boards = np.asarray(boards, dtype=np.int8).reshape(-1, 9)
+    x_to_move = (np.asarray(turns) == X).astype(np.int64)
+    state_keys, transform_ids = clc.boards_canonicalize(boards, x_to_move)
+
+    # Views of the table arrays, nothing is copied
+    keys = np.frombuffer(table.keys, dtype=np.uint32)
+    ranks = np.searchsorted(keys, state_keys)
+    ranks[ranks == len(keys)] = 0
+    found = keys[ranks] == state_keys
+
+    scores = np.frombuffer(table.scores, dtype=np.int8)[ranks]
+    best_masks = np.frombuffer(table.best_cells, dtype=np.uint16)[ranks]
+
+    # Lowest cell of each best cell mask, same as table.best_move()
+    first_cell = np.array([clc.NO_MOVE] + [(cells & -cells).bit_length() - 1 for cells in range(1, 512)], dtype=np.int8)
+    canonical_cells = first_cell[best_masks]
+
+    # INVERSE_TRANSFORM_CELLS padded so that NO_MOVE maps to itself
+    inverse_lookup = np.full((clc.TRANSFORM_COUNT, 16), clc.NO_MOVE, dtype=np.int8)
+    inverse_lookup[:, :9] = clc.INVERSE_TRANSFORM_CELLS
+    best_cells = inverse_lookup[transform_ids, canonical_cells]
+
+    scores[~found] = clc.NO_SCORE
+    best_cells[~found] = clc.NO_MOVE
+
+    if collector is not None:
+        hits = int(found.sum())
+        collector.observe("batch_best_moves", time.perf_counter() - start, canonicalizations=len(boards),
+                        hits=hits, misses=len(boards) - hits)
+    return (scores, best_cells)
+
+
+def getRandomMove(state, rng=None):
+
+    moves = [(i, j) for i, row in enumerate(state["board"]) for j, cell in enumerate(row) if cell == EMPTY]
+    return (rng or thread_random()).choice(moves)
 
 
 def getStateScore(state):
 
+    collector = metrics
+    start = time.perf_counter() if collector is not None else 0.0
+
     win_ner = winner(state)
     if win_ner == None:
-        state_encoded = clc.get_canonical_form(state["board"], state["turn"])
-        return str(scores[state_encoded])
+        table = get_table()
+        state_key = clc.packed_canonical(clc.pack_state(state))
+        rank = _state_rank(table, state_key, state, "getStateScore", collector, start)
+        if collector is not None:
+            collector.observe("getStateScore", time.perf_counter() - start, hits=1)
+        return str(table.score(rank))
     
     elif win_ner == X:
-        return "WIN_X"
+        score = "WIN_X"
     
     elif win_ner == O:
-        return "WIN_O"
+        score = "WIN_O"
 
     else:
-        return ""
\ No newline at end of file
+        score = ""
+
+    # Terminal states are answered without the table
+    if collector is not None:
+        collector.observe("getStateScore", time.perf_counter() - start, canonicalizations=0)
+    return score
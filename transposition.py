@@ -0,0 +1,118 @@
+"""
+Fixed size transposition table for the minimax / negamax engines
+"""
+
+from array import array
+
+EXACT = 0
+UPPERBOUND = 1
+LOWERBOUND = 2
+
+NO_ACTION = -1
+EMPTY_DEPTH = -1
+
+
+class TranspositionTable:
+    """
+    Search results stored in parallel arrays of 2 * 2**bits entries, the memory does not grow with the search.
+    A key (64 bit int) goes to the bucket key & mask, each bucket holds 2 entries:
+    - the depth-preferred entry, only replaced by a search at least as deep or when it is from an older generation
+    - the always-replace entry, which takes the stores the depth-preferred entry refuses
+    new_search() starts a new generation, the entries of previous moves then give way to the new ones.
+    Actions are stored as cells (k = i*3 + j), NO_ACTION for none.
+    """
+
+    __slots__ = ("mask", "keys", "scores", "actions", "depths", "flags", "generations", "generation",
+                 "hits", "misses", "stores", "overwrites")
+
+    def __init__(self, bits=16):
+        size = 2 << bits
+        self.mask = (1 << bits) - 1
+        self.keys = array("Q", bytes(8 * size))
+        self.scores = array("i", bytes(4 * size))
+        self.actions = array("b", [NO_ACTION]) * size
+        self.depths = array("b", [EMPTY_DEPTH]) * size
+        self.flags = array("B", bytes(size))
+        self.generations = array("B", bytes(size))
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def __len__(self):
+        return len(self.depths) - self.depths.count(EMPTY_DEPTH)
+
+    def _find(self, key):
+        index = (key & self.mask) << 1
+        if self.depths[index] != EMPTY_DEPTH and self.keys[index] == key:
+            return index
+        if self.depths[index + 1] != EMPTY_DEPTH and self.keys[index + 1] == key:
+            return index + 1
+        return -1
+
+    def probe(self, key):
+        """
+        Returns (score, action, depth, flag) stored for the key, None if there is no entry.
+        """
+        index = self._find(key)
+        if index < 0:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return (self.scores[index], self.actions[index], self.depths[index], self.flags[index])
+
+    def best_action(self, key):
+        """
+        Returns the stored action of the key, NO_ACTION if there is none. Not counted as a probe.
+        """
+        index = self._find(key)
+        return self.actions[index] if index >= 0 else NO_ACTION
+
+    def store(self, key, score, action, depth, flag):
+        index = (key & self.mask) << 1
+        if not (self.depths[index] == EMPTY_DEPTH
+                or self.keys[index] == key
+                or depth >= self.depths[index]
+                or self.generations[index] != self.generation):
+            index += 1
+
+        if self.depths[index] != EMPTY_DEPTH and self.keys[index] != key:
+            self.overwrites += 1
+        self.stores += 1
+
+        self.keys[index] = key
+        self.scores[index] = score
+        self.actions[index] = action
+        self.depths[index] = depth
+        self.flags[index] = flag
+        self.generations[index] = self.generation
+
+    def new_search(self):
+        """
+        Starts a new generation, call it before each move is searched.
+        """
+        self.generation = (self.generation + 1) & 0xFF
+
+    def clear(self):
+        size = len(self.depths)
+        self.actions = array("b", [NO_ACTION]) * size
+        self.depths = array("b", [EMPTY_DEPTH]) * size
+        self.generation = 0
+        self.hits = self.misses = self.stores = self.overwrites = 0
+
+    def stats(self):
+        return {
+            "entries": len(self),
+            "size": len(self.depths),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+        }
+
+    def nbytes(self):
+        return sum(len(arr) * arr.itemsize
+                   for arr in (self.keys, self.scores, self.actions, self.depths, self.flags, self.generations))